@@ -15,13 +15,14 @@ Handles LoRA fine-tuning and model customization
 """
 import os
 import logging
-import json
 import subprocess
 import tempfile
 from pathlib import Path
 import time
 import shutil
 
+from json_utils import convert_dataset, convert_dataset_directory
+
 logger = logging.getLogger("reflexia-tools.finetune")
 
 class FineTuningManager:
@@ -90,68 +91,11 @@ class FineTuningManager:
     
     def _convert_dataset(self, input_file, output_file):
         """Convert a dataset file to Ollama format"""
-        with open(input_file, 'r') as f_in:
-            # Determine file format
-            if input_file.suffix == '.json':
-                # Assume JSON array
-                data = json.load(f_in)
-                
-                with open(output_file, 'w') as f_out:
-                    for item in data:
-                        # Extract relevant fields based on common formats
-                        prompt = item.get('instruction', item.get('prompt', item.get('input', '')))
-                        response = item.get('output', item.get('response', item.get('completion', '')))
-                        
-                        if prompt and response:
-                            example = {"prompt": prompt, "response": response}
-                            f_out.write(json.dumps(example) + '\n')
-            
-            elif input_file.suffix == '.jsonl':
-                # JSONL format
-                with open(output_file, 'w') as f_out:
-                    for line in f_in:
-                        if line.strip():
-                            item = json.loads(line)
-                            prompt = item.get('instruction', item.get('prompt', item.get('input', '')))
-                            response = item.get('output', item.get('response', item.get('completion', '')))
-                            
-                            if prompt and response:
-                                example = {"prompt": prompt, "response": response}
-                                f_out.write(json.dumps(example) + '\n')
+        convert_dataset(input_file, output_file)
     
     def _process_dataset_directory(self, dir_path, output_file):
         """Process a directory of dataset files"""
-        with open(output_file, 'w') as f_out:
-            # Process each JSON or JSONL file
-            for file_path in dir_path.glob('**/*.json*'):
-                try:
-                    with open(file_path, 'r') as f_in:
-                        # Determine file format
-                        if file_path.suffix == '.json':
-                            # JSON array
-                            data = json.load(f_in)
-                            
-                            for item in data:
-                                prompt = item.get('instruction', item.get('prompt', item.get('input', '')))
-                                response = item.get('output', item.get('response', item.get('completion', '')))
-                                
-                                if prompt and response:
-                                    example = {"prompt": prompt, "response": response}
-                                    f_out.write(json.dumps(example) + '\n')
-                        
-                        elif file_path.suffix == '.jsonl':
-                            # JSONL format
-                            for line in f_in:
-                                if line.strip():
-                                    item = json.loads(line)
-                                    prompt = item.get('instruction', item.get('prompt', item.get('input', '')))
-                                    response = item.get('output', item.get('response', item.get('completion', '')))
-                                    
-                                    if prompt and response:
-                                        example = {"prompt": prompt, "response": response}
-                                        f_out.write(json.dumps(example) + '\n')
-                except Exception as e:
-                    logger.warning(f"Error processing file {file_path}: {e}")
+        convert_dataset_directory(dir_path, output_file)
     
     def _create_modelfile(self, base_model, training_file, model_name=None):
         """Create an Ollama Modelfile for fine-tuning"""
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+json_utils.py - Part of Reflexia Model Manager
+
+Copyright (c) 2025 Matthew D. Scott
+All rights reserved.
+
+This source code is licensed under the Reflexia Model Manager License
+found in the LICENSE file in the root directory of this source tree.
+
+Unauthorized use, reproduction, or distribution is prohibited.
+
+JSON parsing and dataset conversion shared by the Reflexia modules
+"""
+import json
+import logging
+import os
+
+logger = logging.getLogger("reflexia-tools.json")
+
+# Output buffer for converted datasets; examples are small and numerous
+DATASET_WRITE_BUFFER = 1 << 20
+
+# orjson parses and serializes several times faster when installed. Its
+# output leaves non-ASCII text unescaped, so files json_dumps writes to
+# must be opened as UTF-8.
+try:
+    import orjson
+    
+    json_loads = orjson.loads
+    
+    def json_dumps(obj):
+        return orjson.dumps(obj).decode('utf-8')
+except ImportError:
+    json_loads = json.loads
+    json_dumps = json.dumps
+
+# ijson streams JSON arrays item by item instead of loading the whole file
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+def iter_json_array(file_path):
+    """Yield the items of a JSON array file, streaming when ijson is installed"""
+    with open(file_path, 'rb') as f_in:
+        if ijson is not None:
+            yield from ijson.items(f_in, 'item', use_float=True)
+        else:
+            yield from json_loads(f_in.read())
+
+def iter_jsonl(file_path):
+    """Yield the records of a JSONL file, skipping blank lines"""
+    with open(file_path, 'rb') as f_in:
+        for line in f_in:
+            if line.strip():
+                yield json_loads(line)
+
+def _iter_dataset(file_path):
+    """Yield the records of a .json (array) or .jsonl dataset file"""
+    if os.fspath(file_path).endswith('.json'):
+        return iter_json_array(file_path)
+    return iter_jsonl(file_path)
+
+def _write_examples(items, f_out):
+    """Write prompt/response examples found in dataset records as JSONL"""
+    for item in items:
+        # Extract relevant fields based on common formats
+        prompt = item.get('instruction', item.get('prompt', item.get('input', '')))
+        response = item.get('output', item.get('response', item.get('completion', '')))
+        
+        if prompt and response:
+            example = {"prompt": prompt, "response": response}
+            f_out.write(json_dumps(example) + '\n')
+
+def convert_dataset(input_file, output_file):
+    """Convert a JSON or JSONL dataset file to prompt/response JSONL"""
+    items = _iter_dataset(input_file)
+    with open(output_file, 'w', encoding='utf-8', buffering=DATASET_WRITE_BUFFER) as f_out:
+        _write_examples(items, f_out)
+
+def convert_dataset_directory(dir_path, output_file):
+    """Convert every JSON and JSONL file under a directory into one JSONL file
+    
+    Files that fail to parse are logged and skipped.
+    """
+    with open(output_file, 'w', encoding='utf-8', buffering=DATASET_WRITE_BUFFER) as f_out:
+        for root, _, files in os.walk(dir_path):
+            for file_name in files:
+                if not file_name.endswith(('.json', '.jsonl')):
+                    continue
+                file_path = os.path.join(root, file_name)
+                try:
+                    _write_examples(_iter_dataset(file_path), f_out)
+                except Exception as e:
+                    logger.warning(f"Error processing file {file_path}: {e}")
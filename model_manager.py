@@ -12,15 +12,113 @@ Core adaptive quantization technology is patent-pending.
 
 import os
 import json
+import hashlib
 import logging
 import subprocess
-import tempfile
 import time
 from functools import lru_cache
+from urllib.parse import urlsplit
+from urllib.request import Request, urlopen
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 logger = logging.getLogger("reflexia-tools.model")
 
+# Quantization levels from lowest to highest quality
+QUANTIZATION_LEVELS = ("q4_0", "q4_k_m", "q5_k_m", "q8_0", "f16")
+
+# Seconds to reuse the parsed Ollama model list before querying again
+MODEL_LIST_TTL = 5.0
+
+# Timeout in seconds for Ollama API metadata requests
+OLLAMA_API_TIMEOUT = 5.0
+
+# Timeout in seconds waiting on a generation stream (per read, not total)
+OLLAMA_GENERATE_TIMEOUT = 300.0
+
+# Port Ollama listens on when OLLAMA_HOST gives none
+OLLAMA_DEFAULT_PORT = 11434
+
+# Terms that suggest technical content, used by estimate_content_complexity
+# (lowercase, matched against the lowercased text)
+TECHNICAL_TERMS = (
+    "algorithm", "function", "variable", "module", "tensor",
+    "derivative", "integral", "matrix", "vector", "quantum",
+    "regression", "neural network", "transformer", "attention",
+    "parameter", "coefficient", "theorem", "equation"
+)
+
+# Characters that suggest code or math content
+SPECIAL_CHARS = "{}[]()<>+-*/\\=^;:"
+
+# Deleting the special characters lets str.translate count them in C
+_SPECIAL_DEL_TABLE = str.maketrans("", "", SPECIAL_CHARS)
+
+# Weights of the (length, term, special) factors in the complexity score
+COMPLEXITY_WEIGHTS = (0.4, 0.4, 0.2)
+
+# Complexity factors for recently seen texts, keyed on a content digest so
+# long prompts are not kept alive by the cache
+COMPLEXITY_CACHE_SIZE = 1024
+_complexity_cache = {}
+
+
+def _ollama_base_url(host):
+    """Build the Ollama API base URL from an OLLAMA_HOST value
+    
+    Follows the ollama CLI: a bare host ("localhost", "0.0.0.0") uses
+    OLLAMA_DEFAULT_PORT, while an explicit http:// or https:// URL keeps
+    its scheme's default port.
+    """
+    host = host.strip()
+    if "://" not in host:
+        parts = urlsplit(f"http://{host}")
+        if parts.port is None:
+            host = f"{parts.netloc}:{OLLAMA_DEFAULT_PORT}{parts.path}"
+        host = f"http://{host}"
+    return host.rstrip("/")
+
+
+def _with_default_tag(model_name):
+    """Return a model name with Ollama's implicit ":latest" tag added"""
+    if ":" in model_name.rsplit("/", 1)[-1]:
+        return model_name
+    return f"{model_name}:latest"
+
+
+def _content_complexity_factors(text):
+    """Compute the (length, term, special) complexity factors for a text
+    
+    Results are memoized on a BLAKE2b digest of the text, so repeat prompts
+    (planning, logging, adaptive quantization) are only scanned once.
+    """
+    key = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    factors = _complexity_cache.get(key)
+    if factors is not None:
+        return factors
+    
+    # 1. Length factor (longer texts tend to be more complex)
+    length = len(text)
+    length_factor = min(1.0, length / 10000)  # Cap at 10,000 chars
+    
+    # 2. Technical term factor (number of distinct terms present). The text
+    # is lowercased once; each substring search stops at its first hit
+    lowered = text.lower()
+    term_count = sum(1 for term in TECHNICAL_TERMS if term in lowered)
+    term_factor = min(1.0, term_count / 10)  # Cap at 10 terms
+    
+    # 3. Special characters factor (code, math, etc.)
+    special_chars = length - len(text.translate(_SPECIAL_DEL_TABLE))
+    special_factor = min(1.0, special_chars / 100)  # Cap at 100 special chars
+    
+    factors = (length_factor, term_factor, special_factor)
+    
+    # Evict the oldest entry once full (dicts keep insertion order)
+    if len(_complexity_cache) >= COMPLEXITY_CACHE_SIZE:
+        _complexity_cache.pop(next(iter(_complexity_cache)), None)
+    _complexity_cache[key] = factors
+    return factors
+
+
 class ModelManager:
     """Manager for the Reflexia model through Ollama"""
     
@@ -39,8 +137,34 @@ class ModelManager:
         self.batch_size = int(get_env_var("BATCH_SIZE", 
                                          config.get("model", "batch_size", default=8)))
         
+        # Ollama API base URL (OLLAMA_HOST may omit the scheme and port)
+        self.ollama_url = _ollama_base_url(get_env_var("OLLAMA_HOST", "localhost:11434"))
+        
         # Set up LRU cache size
         self.cache_size = config.get("memory", "lru_cache_size", default=64)
+        self._response_cache = self._build_response_cache(self.cache_size)
+        
+        # Adaptive quantization settings, read once rather than per request
+        self._memory_thresholds = (
+            config.get("memory", "critical_memory_threshold", default=90),
+            config.get("memory", "high_memory_threshold", default=85),
+            config.get("memory", "medium_memory_threshold", default=75),
+            config.get("memory", "low_memory_threshold", default=55),
+        )
+        self._auto_improve_quality = config.get("model", "auto_improve_quality", default=False)
+        self._quant_idx = self._quantization_index(self.quantization)
+        
+        # Minimum time at a quantization level before adapting again, so
+        # memory wobble doesn't thrash model pulls and reloads
+        self._quant_dwell_s = config.get("model", "quantization_dwell_seconds", default=60)
+        self._last_quant_change = None
+        
+        # Minimum seconds between memory checks in adaptive_quantization
+        self._adapt_check_interval = config.get("model", "adaptive_check_interval", default=1.0)
+        self._last_adapt_check = None
+        
+        # Cached (timestamp, model names) from the Ollama API
+        self._models_cache = None
         
         # Ensure Ollama is using Metal acceleration
         if config.get("resources", "metal_optimized", default=True):
@@ -51,17 +175,45 @@ class ModelManager:
         # Check if model is available
         self._check_model_availability()
     
+    @staticmethod
+    def _quantization_index(quantization):
+        """Position of a quantization level in QUANTIZATION_LEVELS (0 if unknown)"""
+        try:
+            return QUANTIZATION_LEVELS.index(quantization)
+        except ValueError:
+            return 0
+    
+    def _list_models(self):
+        """List the models installed in Ollama
+        
+        Queries the Ollama /api/tags endpoint directly rather than spawning
+        `ollama list`. The result is reused for MODEL_LIST_TTL seconds so
+        frequent quantization changes don't hit the server each time.
+        
+        Returns:
+            set: Installed model names
+        """
+        now = time.monotonic()
+        if self._models_cache is not None and now - self._models_cache[0] < MODEL_LIST_TTL:
+            return self._models_cache[1]
+        
+        with urlopen(f"{self.ollama_url}/api/tags", timeout=OLLAMA_API_TIMEOUT) as response:
+            tags = json.load(response)
+        
+        models = {model["name"] for model in tags.get("models", [])}
+        
+        self._models_cache = (now, models)
+        return models
+    
+    def _invalidate_model_list(self):
+        """Forget the cached Ollama model list"""
+        self._models_cache = None
+    
     def _check_model_availability(self):
         """Check if the model is available in Ollama"""
         try:
-            result = subprocess.run(
-                ["ollama", "list"], 
-                capture_output=True, 
-                text=True, 
-                check=True
-            )
-            
-            if self.model_name in result.stdout:
+            # Ollama lists every model with a tag; "llama3" means "llama3:latest"
+            if _with_default_tag(self.model_name) in self._list_models():
                 logger.info(f"Model {self.model_name} is available")
             else:
                 logger.warning(f"Model {self.model_name} not found in Ollama")
@@ -86,93 +238,111 @@ class ModelManager:
             print(f"Error: Failed to load model: {e}")
             return False
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
-    def generate_response(self, prompt, system_prompt=None, temperature=0.7, top_p=0.9):
-        """Generate a response from the model with retry capability"""
-        logger.debug(f"Generating response for prompt: {prompt[:50]}...")
+    def generate_stream(self, prompt, system_prompt=None, temperature=0.7, top_p=0.9):
+        """Stream a response from the model as it is generated
         
-        try:
-            # Prepare command
-            cmd = ["ollama", "run", self.model_name, "--format", "json"]
+        Uses Ollama's streaming /api/generate endpoint and parses each
+        newline-delimited JSON chunk as it arrives, so callers can consume
+        tokens while generation continues.
+        
+        Args:
+            prompt: Prompt text
+            system_prompt: System prompt (optional)
+            temperature: Sampling temperature
+            top_p: Nucleus sampling probability
             
-            # Prepare input data
-            input_data = {
-                "prompt": prompt,
-                "stream": False,
+        Yields:
+            str: Response text fragments
+        """
+        payload = {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": True,
+            "options": {
                 "temperature": temperature,
                 "top_p": top_p,
-                "context_length": self.context_length,
-            }
-            
-            if system_prompt:
-                input_data["system"] = system_prompt
-            
-            # Create a temporary file for input
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-                json.dump(input_data, f)
-                input_file = f.name
-            
-            # Run ollama with input from file
-            result = subprocess.run(
-                cmd,
-                input=json.dumps(input_data),
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            
-            # Parse response
-            try:
-                response_data = json.loads(result.stdout)
-                response = response_data.get('response', '')
+                "num_ctx": self.context_length,
+            },
+        }
+        
+        if system_prompt:
+            payload["system"] = system_prompt
+        
+        request = Request(
+            f"{self.ollama_url}/api/generate",
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"}
+        )
+        
+        with urlopen(request, timeout=OLLAMA_GENERATE_TIMEOUT) as response:
+            for line in response:
+                if not line.strip():
+                    continue
                 
-                # Log metrics if available
-                if 'eval_count' in response_data:
-                    logger.debug(f"Eval count: {response_data['eval_count']}, " 
-                                f"Eval duration: {response_data.get('eval_duration', 0)}")
+                chunk = json.loads(line)
+                if "error" in chunk:
+                    raise RuntimeError(f"Ollama error: {chunk['error']}")
                 
-                return response
-            except json.JSONDecodeError:
-                # If JSON parsing fails, return the raw output
-                logger.warning("Failed to parse JSON response, returning raw output")
-                return result.stdout
+                if chunk.get("response"):
+                    yield chunk["response"]
                 
-        except subprocess.CalledProcessError as e:
+                if chunk.get("done"):
+                    # Log metrics if available
+                    if 'eval_count' in chunk:
+                        logger.debug(f"Eval count: {chunk['eval_count']}, " 
+                                    f"Eval duration: {chunk.get('eval_duration', 0)}")
+                    break
+    
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+    def generate_response(self, prompt, system_prompt=None, temperature=0.7, top_p=0.9):
+        """Generate a response from the model with retry capability"""
+        logger.debug(f"Generating response for prompt: {prompt[:50]}...")
+        
+        try:
+            return "".join(self.generate_stream(
+                prompt,
+                system_prompt=system_prompt,
+                temperature=temperature,
+                top_p=top_p
+            ))
+        except OSError as e:
             logger.error(f"Error calling model: {e}")
-            logger.error(f"Error output: {e.stderr}")
             raise
         except Exception as e:
             logger.error(f"Unexpected error generating response: {e}")
             raise
-        finally:
-            # Clean up temp file
-            if 'input_file' in locals():
-                try:
-                    os.unlink(input_file)
-                except:
-                    pass
     
-    @lru_cache(maxsize=None)  # Size will be set in __init__
+    def _build_response_cache(self, size):
+        """Build a bounded LRU cache around generate_response
+        
+        The cache is keyed on the model and quantization as well as the
+        generation arguments, so switching models never serves stale output.
+        """
+        @lru_cache(maxsize=size)
+        def _cached(model_name, quantization, prompt, system, temperature, top_p):
+            return self.generate_response(prompt, system_prompt=system or None,
+                                          temperature=temperature, top_p=top_p)
+        return _cached
+    
     def cached_response(self, prompt, system_prompt=None, temperature=0.7, top_p=0.9):
         """Cached version of generate_response"""
         # Convert None to empty string for consistent caching
         system = system_prompt or ""
-        return self.generate_response(prompt, system_prompt=system, temperature=temperature, top_p=top_p)
+        return self._response_cache(self.model_name, self.quantization, prompt,
+                                    system, temperature, top_p)
     
     def set_cache_size(self, size):
         """Update the LRU cache size"""
         # We need to recreate the cache with the new size
-        self.cached_response.cache_clear()
-        
-        # Create a new cached function with updated size
-        self.cached_response = lru_cache(maxsize=size)(self.generate_response)
+        self._response_cache.cache_clear()
+        self._response_cache = self._build_response_cache(size)
         self.cache_size = size
         
         logger.info(f"Cache size updated to {size}")
     
     def clear_cache(self):
         """Clear the response cache"""
-        self.cached_response.cache_clear()
+        self._response_cache.cache_clear()
         logger.info("Response cache cleared")
     
     def create_embedding(self, text):
@@ -193,18 +363,18 @@ class ModelManager:
         Returns:
             bool: Success status
         """
-        valid_quantizations = ["q4_0", "q4_k_m", "q5_k_m", "q8_0", "f16"]
-        
-        if quantization_type not in valid_quantizations:
+        if quantization_type not in QUANTIZATION_LEVELS:
             logger.error(f"Invalid quantization type: {quantization_type}")
             print(f"Invalid quantization type: {quantization_type}")
-            print(f"Valid types: {', '.join(valid_quantizations)}")
+            print(f"Valid types: {', '.join(QUANTIZATION_LEVELS)}")
             return False
         
         # Check if this requires changing the model
         if quantization_type != self.quantization:
             logger.info(f"Changing quantization from {self.quantization} to {quantization_type}")
             self.quantization = quantization_type
+            self._quant_idx = self._quantization_index(quantization_type)
+            self._last_quant_change = time.monotonic()
             
             # Create a new model name with the quantization parameter
             model_parts = self.model_name.split(':')
@@ -213,14 +383,7 @@ class ModelManager:
             
             # Check if the model with this quantization exists
             try:
-                result = subprocess.run(
-                    ["ollama", "list"], 
-                    capture_output=True, 
-                    text=True, 
-                    check=True
-                )
-                
-                if new_model_name in result.stdout:
+                if new_model_name in self._list_models():
                     # Model with this quantization exists
                     self.model_name = new_model_name
                     logger.info(f"Using existing model with quantization: {new_model_name}")
@@ -231,15 +394,16 @@ class ModelManager:
                     print(f"Pulling model with {quantization_type} quantization (this may take a while)...")
                     
                     # Run pull in a separate process
-                    result = subprocess.run(
+                    subprocess.run(
                         ["ollama", "pull", new_model_name],
                         check=True
                     )
+                    self._invalidate_model_list()
                     
                     self.model_name = new_model_name
                     return True
                     
-            except subprocess.CalledProcessError as e:
+            except (subprocess.CalledProcessError, OSError, ValueError) as e:
                 logger.error(f"Error changing quantization: {e}")
                 print(f"Error: Failed to change quantization: {e}")
                 return False
@@ -247,74 +411,42 @@ class ModelManager:
         # Already using this quantization
         return True
 
-    def adaptive_quantization(self, memory_manager):
-        """Adaptively change quantization based on memory pressure
-        
-        Args:
-            memory_manager: MemoryManager instance to monitor memory
-            
-        Returns:
-            bool: True if quantization was changed
-        """
-        memory_stats = memory_manager.get_memory_stats()
-        memory_percent = memory_stats.get("percent", 0)
-        
-        # Define thresholds for different quantization levels
-        high_threshold = self.config.get("memory", "high_memory_threshold", default=85)
-        
-        # Current quantization level
-        current_level = self.quantization
-        
-        # Check memory pressure and adjust quantization
-        if memory_percent > high_threshold:
-            # High memory pressure - use lower precision
-            if current_level == "f16":
-                return self.set_quantization("q8_0")
-            elif current_level == "q8_0":
-                return self.set_quantization("q5_k_m")
-            elif current_level == "q5_k_m":
-                return self.set_quantization("q4_k_m")
-            elif current_level == "q4_k_m":
-                return self.set_quantization("q4_0")
-        elif memory_percent < 50 and current_level != "q8_0" and current_level != "f16":
-            # Low memory pressure - can use higher precision if desired
-            # This is optional and can be based on user preference
-            return False  # Don't automatically increase quality, let user decide
-        
-        # No change needed
-        return False
-
-    def adaptive_quantization(self, memory_manager=None, content_complexity=None):
+    def adaptive_quantization(self, memory_manager=None, content_complexity=None, force_reduction=False):
         """Adaptively change quantization based on memory pressure and content complexity
         
         Args:
             memory_manager: MemoryManager instance to monitor memory (optional)
             content_complexity: Estimated complexity of the content (0-1, optional)
+            force_reduction: Always step down at least one level (used by recovery)
             
         Returns:
             bool: True if quantization was changed
         """
-        # Default quantization levels from lowest to highest quality
-        quant_levels = ["q4_0", "q4_k_m", "q5_k_m", "q8_0", "f16"]
+        # Rate-limit checks so per-request calls don't sample memory every time
+        now = time.monotonic()
+        if (not force_reduction and self._last_adapt_check is not None
+                and now - self._last_adapt_check < self._adapt_check_interval):
+            return False
+        self._last_adapt_check = now
         
-        # Get current level index
-        current_index = quant_levels.index(self.quantization) if self.quantization in quant_levels else 0
+        max_index = len(QUANTIZATION_LEVELS) - 1
+        current_index = self._quant_idx
         target_index = current_index
         
-        # FACTOR 1: Memory pressure - prioritize memory efficiency under pressure
+        # Sample memory once; both factors below use the same reading
+        memory_percent = None
         if memory_manager:
-            memory_stats = memory_manager.get_memory_stats()
-            memory_percent = memory_stats.get("percent", 0)
-            
-            # Define thresholds for different memory pressure levels
-            critical_threshold = self.config.get("memory", "critical_memory_threshold", default=90)
-            high_threshold = self.config.get("memory", "high_memory_threshold", default=85)
-            medium_threshold = self.config.get("memory", "medium_memory_threshold", default=75)
-            low_threshold = self.config.get("memory", "low_memory_threshold", default=60)
+            memory_percent = memory_manager.get_memory_stats().get("percent", 0)
+        
+        # FACTOR 1: Memory pressure - prioritize memory efficiency under pressure
+        critical_pressure = False
+        if memory_percent is not None:
+            critical_threshold, high_threshold, medium_threshold, low_threshold = self._memory_thresholds
             
             # Adjust based on memory pressure
             if memory_percent > critical_threshold:
                 # Critical pressure - use lowest quality
+                critical_pressure = True
                 target_index = 0
                 logger.warning(f"Critical memory pressure ({memory_percent}%), forcing lowest quantization")
             elif memory_percent > high_threshold:
@@ -325,10 +457,10 @@ class ModelManager:
                 # Medium pressure - move down by 1 level if not already at lowest
                 target_index = max(0, current_index - 1)
                 logger.info(f"Medium memory pressure ({memory_percent}%), decreasing quantization by 1 level")
-            elif memory_percent < low_threshold and current_index < len(quant_levels) - 1:
+            elif memory_percent < low_threshold and current_index < max_index:
                 # Low pressure - consider moving up if user has enabled auto-quality improvement
-                if self.config.get("model", "auto_improve_quality", default=False):
-                    target_index = min(len(quant_levels) - 1, current_index + 1)
+                if self._auto_improve_quality:
+                    target_index = min(max_index, current_index + 1)
                     logger.info(f"Low memory pressure ({memory_percent}%), increasing quantization")
         
         # FACTOR 2: Content complexity - use higher quality for complex content
@@ -337,15 +469,27 @@ class ModelManager:
             complexity_adjustment = int(content_complexity * 2)  # 0-2 level adjustment
             
             # Only adjust up for complexity if memory permits
-            if memory_manager and memory_manager.get_memory_stats().get("percent", 0) < 70:
-                complexity_target = min(len(quant_levels) - 1, current_index + complexity_adjustment)
+            if memory_percent is not None and memory_percent < 70:
+                complexity_target = min(max_index, current_index + complexity_adjustment)
                 # Take the higher of the memory-based target and complexity-based target
                 target_index = max(target_index, complexity_target)
                 logger.info(f"Content complexity {content_complexity}, adjusting quantization")
         
+        # Recovery asks for a lighter model regardless of the other factors
+        if force_reduction:
+            target_index = min(target_index, max(0, current_index - 1))
+        
+        # Hold the current level for the dwell time unless memory is critical
+        # or recovery forces a reduction
+        if target_index != current_index and not (force_reduction or critical_pressure):
+            if (self._last_quant_change is not None
+                    and time.monotonic() - self._last_quant_change < self._quant_dwell_s):
+                logger.debug(f"Keeping quantization {self.quantization} for at least {self._quant_dwell_s}s")
+                return False
+        
         # Apply change if needed
         if target_index != current_index:
-            target_quant = quant_levels[target_index]
+            target_quant = QUANTIZATION_LEVELS[target_index]
             logger.info(f"Changing quantization from {self.quantization} to {target_quant}")
             return self.set_quantization(target_quant)
         
@@ -361,28 +505,33 @@ class ModelManager:
             float: Complexity score (0-1), higher means more complex
         """
         # Simple heuristic complexity estimation
+        length_factor, term_factor, special_factor = _content_complexity_factors(text)
         
-        # 1. Length factor (longer texts tend to be more complex)
-        length = len(text)
-        length_factor = min(1.0, length / 10000)  # Cap at 10,000 chars
+        # Calculate weighted score
+        length_weight, term_weight, special_weight = COMPLEXITY_WEIGHTS
+        complexity = length_weight * length_factor + term_weight * term_factor + special_weight * special_factor
         
-        # 2. Technical term factor
-        technical_terms = [
-            "algorithm", "function", "variable", "module", "tensor", 
-            "derivative", "integral", "matrix", "vector", "quantum",
-            "regression", "neural network", "transformer", "attention",
-            "parameter", "coefficient", "theorem", "equation"
-        ]
+        logger.debug(f"Content complexity: {complexity:.2f} (length: {length_factor:.2f}, terms: {term_factor:.2f}, special: {special_factor:.2f})")
+        return complexity
+    
+    def estimate_content_complexities(self, texts):
+        """Estimate content complexity for a batch of texts
         
-        term_count = sum(1 for term in technical_terms if term.lower() in text.lower())
-        term_factor = min(1.0, term_count / 10)  # Cap at 10 terms
+        Equivalent to calling estimate_content_complexity on each text, but
+        the weighted sum is done as a single matrix product, which suits
+        batch pipelines such as RAG ingestion.
         
-        # 3. Special characters factor (code, math, etc.)
-        special_chars = sum(1 for char in text if char in "{}[]()<>+-*/\\=^;:")
-        special_factor = min(1.0, special_chars / 100)  # Cap at 100 special chars
+        Args:
+            texts: Iterable of text contents to analyze
+            
+        Returns:
+            numpy.ndarray: Complexity scores (0-1), one per text
+        """
+        # Import here to allow optional dependency
+        import numpy as np
         
-        # Calculate weighted score
-        complexity = 0.4 * length_factor + 0.4 * term_factor + 0.2 * special_factor
+        factors = np.array([_content_complexity_factors(text) for text in texts], dtype=np.float64)
+        if factors.size == 0:
+            return np.zeros(0, dtype=np.float64)
         
-        logger.debug(f"Content complexity: {complexity:.2f} (length: {length_factor:.2f}, terms: {term_factor:.2f}, special: {special_factor:.2f})")
-        return complexity
\ No newline at end of file
+        return factors @ np.array(COMPLEXITY_WEIGHTS, dtype=np.float64)
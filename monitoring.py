@@ -15,11 +15,16 @@ Handles Prometheus metrics and monitoring infrastructure
 """
 import time
 import logging
+import psutil
 from prometheus_client import Counter, Histogram, Gauge, start_http_server
 from functools import wraps
 
 logger = logging.getLogger("reflexia-tools.monitoring")
 
+# PrometheusMetrics from the optional prometheus_flask_exporter package,
+# resolved on first use (False once the import is known to fail)
+_PrometheusMetrics = None
+
 # Create metrics
 REQUESTS = Counter(
     'reflexia_http_requests_total',
@@ -70,6 +75,22 @@ ACTIVE_CONNECTIONS = Gauge(
 )
 
 
+def _load_prometheus_metrics():
+    """Import PrometheusMetrics once, remembering success or failure.
+
+    Returns:
+        PrometheusMetrics class or None if prometheus_flask_exporter is missing
+    """
+    global _PrometheusMetrics
+    if _PrometheusMetrics is None:
+        try:
+            from prometheus_flask_exporter import PrometheusMetrics
+            _PrometheusMetrics = PrometheusMetrics
+        except ImportError:
+            _PrometheusMetrics = False
+    return _PrometheusMetrics or None
+
+
 def instrument_flask_app(app):
     """Add Prometheus Flask exporter to the Flask app.
 
@@ -79,20 +100,20 @@ def instrument_flask_app(app):
     Returns:
         PrometheusMetrics instance or None if not available
     """
-    try:
-        from prometheus_flask_exporter import PrometheusMetrics
-        metrics = PrometheusMetrics(app)
-
-        # Add default metrics
-        metrics.info('reflexia_app_info', 'Application info',
-                     version='1.0.0', service='reflexia-model-manager')
-
-        logger.info("Prometheus Flask metrics initialized")
-        return metrics
-    except ImportError:
+    PrometheusMetrics = _load_prometheus_metrics()
+    if PrometheusMetrics is None:
         logger.warning("prometheus_flask_exporter not installed, skipping Flask instrumentation")
         return None
 
+    metrics = PrometheusMetrics(app)
+
+    # Add default metrics
+    metrics.info('reflexia_app_info', 'Application info',
+                 version='1.0.0', service='reflexia-model-manager')
+
+    logger.info("Prometheus Flask metrics initialized")
+    return metrics
+
 
 def start_metrics_server(port=9090):
     """Start a dedicated Prometheus metrics server.
@@ -107,37 +128,40 @@ def start_metrics_server(port=9090):
         logger.error(f"Failed to start Prometheus metrics server: {e}")
 
 
+def _memory_stat_reader(memory_manager, key):
+    """Build a callback that reads one memory statistic at scrape time.
+
+    Args:
+        memory_manager: MemoryManager instance to query
+        key: Key in the get_memory_stats() result
+
+    Returns:
+        Zero-argument callable returning the current value
+    """
+    def read():
+        try:
+            return memory_manager.get_memory_stats().get(key, 0)
+        except Exception as e:
+            logger.error(f"Error reading memory metric '{key}': {e}")
+            return float("nan")
+
+    return read
+
+
 def track_memory_usage(memory_manager, interval=15):
-    """Background task to track memory usage metrics.
+    """Track memory usage metrics.
+
+    The gauges are sampled when Prometheus scrapes them rather than by a
+    background polling thread, so no work is done between scrapes.
 
     Args:
         memory_manager: MemoryManager instance to monitor
-        interval: Polling interval in seconds (default: 15)
+        interval: Unused, kept for backwards compatibility
     """
-    import threading
-
-    def update_metrics():
-        while True:
-            try:
-                # Get memory stats
-                stats = memory_manager.get_memory_stats()
-
-                # Update gauges
-                MEMORY_USAGE.set(stats.get("used", 0))
-                MEMORY_PERCENT.set(stats.get("percent", 0))
-
-                # Get CPU stats
-                import psutil
-                CPU_PERCENT.set(psutil.cpu_percent())
-
-                time.sleep(interval)
-            except Exception as e:
-                logger.error(f"Error updating memory metrics: {e}")
-                time.sleep(interval)
-
-    thread = threading.Thread(target=update_metrics, daemon=True)
-    thread.start()
-    logger.info(f"Memory metrics tracking started with {interval}s interval")
+    MEMORY_USAGE.set_function(_memory_stat_reader(memory_manager, "used"))
+    MEMORY_PERCENT.set_function(_memory_stat_reader(memory_manager, "percent"))
+    CPU_PERCENT.set_function(psutil.cpu_percent)
+    logger.info("Memory metrics tracking enabled (sampled on scrape)")
 
 
 def track_model_inference(func):
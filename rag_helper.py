@@ -13,32 +13,45 @@ Unauthorized use, reproduction, or distribution is prohibited.
 Reflexia RAG Helper: Easy start, stop and document management for RAG
 """
 import os
+import stat
 import sys
-import shutil
-import subprocess
-import argparse
-from pathlib import Path
+
+# shutil, subprocess, argparse and concurrent.futures are imported by the
+# commands that need them, so each CLI call only loads what it uses
+
+# RAG manager shared by the commands in this process, created on first use
+_rag_manager = None
+
+def get_rag_manager():
+    """Get the in-process RAG manager, loading the embedding model once"""
+    global _rag_manager
+    if _rag_manager is None:
+        # Import here so commands that don't touch the vector DB skip it
+        from config import Config
+        from rag_manager import RAGManager
+        _rag_manager = RAGManager(Config())
+    return _rag_manager
 
 def fix_rag():
     """Apply all RAG fixes in correct sequence"""
     print("Applying RAG fixes for Apple Silicon...")
     
-    # 1. Fix the RAG manager
+    # rag_manager forces CPU embeddings on import and creates the vector DB
+    # on initialization, so setting it up in-process applies both fixes
     try:
-        # Run rag_manager_fix.py
-        subprocess.run(["python", "rag_manager_fix.py"], check=True)
-        
-        # Run fix_rag_final.py to rebuild vector DB
-        subprocess.run(["python", "fix_rag_final.py"], check=True)
+        if not get_rag_manager().is_available():
+            print("❌ Error applying fixes: vector database is not available")
+            return False
         
         print("\n✅ RAG system ready! You can now run the model with RAG enabled.")
         return True
-    except subprocess.CalledProcessError as e:
+    except Exception as e:
         print(f"❌ Error applying fixes: {e}")
         return False
 
 def start_rag(interactive=True, web=False):
     """Start Reflexia model with RAG enabled"""
+    import subprocess
     try:
         cmd = ["python", "main.py"]
         
@@ -62,28 +75,119 @@ def start_rag(interactive=True, web=False):
         print(f"❌ Error starting Reflexia: {e}")
         return None
 
+def _is_file(path):
+    """Check a path is an existing regular file with a single stat call"""
+    try:
+        return stat.S_ISREG(os.stat(path).st_mode)
+    except OSError:
+        return False
+
+def _copy_document(src, dest):
+    """Copy a document, hard-linking it when possible
+    
+    A hard link costs no data copy when both paths are on one filesystem
+    (the two names then share contents); otherwise copyfile copies the
+    contents only (sendfile on Linux), skipping shutil.copy's chmod.
+    The copy is made under a temporary name next to dest and renamed over
+    it, so a failed copy never removes an existing dest.
+    """
+    # Compare the files themselves, so a symlink or hard link to dest is
+    # recognised as the same document and left alone
+    if os.path.exists(dest) and os.path.samefile(src, dest):
+        return
+    import shutil
+    import tempfile
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(dest)}.", dir=os.path.dirname(os.path.abspath(dest))
+    )
+    os.close(fd)
+    try:
+        try:
+            os.remove(tmp_path)
+            os.link(src, tmp_path)
+        except OSError:
+            shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, dest)
+    except BaseException:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
 def add_document(filepath):
     """Add a document to the RAG database"""
+    return add_documents([filepath])
+
+def add_documents(filepaths):
+    """Add several documents to the RAG database, indexing them together"""
     try:
-        if not Path(filepath).exists():
-            print(f"❌ Document not found: {filepath}")
+        # Check every file before copying any, so a typo doesn't leave a
+        # partial batch behind
+        missing = [filepath for filepath in filepaths if not _is_file(filepath)]
+        if missing:
+            for filepath in missing:
+                print(f"❌ Document not found: {filepath}")
             return False
-            
-        # Copy file to project directory
-        dest_path = Path(filepath).name
-        shutil.copy(filepath, dest_path)
-        print(f"✅ Document copied to project directory: {dest_path}")
-        
-        # Rebuild the database
-        subprocess.run(["python", "fix_rag_final.py"], check=True)
-        print(f"✅ Document added to RAG database: {filepath}")
+        
+        # Every document is copied to the project directory under its
+        # basename, so two with the same name would overwrite each other
+        seen = set()
+        duplicates = []
+        for filepath in filepaths:
+            name = os.path.basename(filepath)
+            if name in seen:
+                duplicates.append(name)
+            seen.add(name)
+        if duplicates:
+            for name in dict.fromkeys(duplicates):
+                print(f"❌ More than one document is named {name}")
+            return False
+        
+        # Copy files to project directory
+        dest_paths = []
+        for filepath in filepaths:
+            dest_path = os.path.basename(filepath)
+            _copy_document(filepath, dest_path)
+            print(f"✅ Document copied to project directory: {dest_path}")
+            dest_paths.append(dest_path)
+        
+        # Index all copies in one insert, reusing the loaded embedding model
+        if not get_rag_manager().load_files(dest_paths):
+            print(f"❌ Error adding documents: could not index {', '.join(dest_paths)}")
+            return False
+        for filepath in filepaths:
+            print(f"✅ Document added to RAG database: {filepath}")
         return True
     except Exception as e:
         print(f"❌ Error adding document: {e}")
         return False
 
+# Metadata rows fetched per request when listing a collection
+LIST_BATCH_SIZE = 1000
+
+def _fetch_collection(client, name):
+    """Fetch a collection's document sources, returning (name, sources, error)
+    
+    Only sources are listed, so metadata alone is fetched; documents and
+    embeddings are the bulk of a collection's payload. Rows are paged so
+    only the source strings of a large collection are held at once.
+    """
+    try:
+        collection = client.get_collection(name)
+        sources = []
+        offset = 0
+        while True:
+            page = collection.get(include=["metadatas"], limit=LIST_BATCH_SIZE, offset=offset)
+            metadatas = page.get("metadatas") or []
+            sources.extend(metadata.get("source") if metadata else None for metadata in metadatas)
+            if len(metadatas) < LIST_BATCH_SIZE:
+                return name, sources, None
+            offset += LIST_BATCH_SIZE
+    except Exception as e:
+        return name, None, e
+
 def list_documents():
     """List documents in the RAG database"""
+    from concurrent.futures import ThreadPoolExecutor
     try:
         import chromadb
         client = chromadb.PersistentClient(path="vector_db")
@@ -95,33 +199,27 @@ def list_documents():
             print("❌ No collections found in the database")
             return False
         
+        # Fetch all collections concurrently; each get is a round trip to
+        # the Chroma store, so total time follows the slowest collection
+        names = [coll.name for coll in collections]
+        with ThreadPoolExecutor(max_workers=min(8, len(names))) as executor:
+            fetched = list(executor.map(lambda name: _fetch_collection(client, name), names))
+        
         total_docs = 0
-        for coll in collections:
-            try:
-                # Get the collection by name
-                collection = client.get_collection(coll.name)
-                
-                # Get all documents and metadata from collection
-                try:
-                    results = collection.get(include=["documents", "metadatas", "embeddings"])
-                    doc_count = len(results.get("ids", []))
-                    
-                    print(f"\nCollection '{coll.name}': {doc_count} documents")
-                    
-                    # Show document sources
-                    for i, metadata in enumerate(results.get("metadatas", [])):
-                        if metadata and "source" in metadata:
-                            source = metadata["source"]
-                            print(f"  {i+1}. {source}")
-                        else:
-                            print(f"  {i+1}. [Document without source]")
-                        total_docs += 1
-                        
-                except Exception as e:
-                    print(f"  Error retrieving documents: {e}")
-                    
-            except Exception as e:
-                print(f"  Error accessing collection {coll.name}: {e}")
+        for name, sources, error in fetched:
+            if error is not None:
+                print(f"  Error accessing collection {name}: {error}")
+                continue
+            
+            print(f"\nCollection '{name}': {len(sources)} documents")
+            
+            # Show document sources
+            for i, source in enumerate(sources):
+                if source is not None:
+                    print(f"  {i+1}. {source}")
+                else:
+                    print(f"  {i+1}. [Document without source]")
+                total_docs += 1
         
         if total_docs == 0:
             print("❌ No documents found in any collection")
@@ -135,6 +233,7 @@ def list_documents():
 
 def start_interactive():
     """Start Reflexia with interactive RAG mode only (no web dependencies)"""
+    import subprocess
     try:
         print("Starting Reflexia in interactive RAG mode...")
         
@@ -152,6 +251,7 @@ def start_interactive():
 
 def start_web_ui():
     """Start Reflexia with Web UI and RAG enabled"""
+    import subprocess
     try:
         print("Starting Web UI with RAG enabled...")
         
@@ -171,7 +271,48 @@ def start_web_ui():
         print(f"❌ Error starting Web UI: {e}")
         return None
 
-def main():
+def _start_command(args):
+    """Run the start command from its raw arguments"""
+    start_rag(interactive="--no-interactive" not in args, web="--web" in args)
+
+# Commands dispatched without argparse, with the options each accepts
+# (None for any positional arguments). Anything else, including --help,
+# goes through the full parser.
+_FAST_COMMANDS = {
+    "fix": (lambda args: fix_rag(), ()),
+    "start": (_start_command, ("--web", "--no-interactive")),
+    "add": (lambda args: add_documents(args), None),
+    "list": (lambda args: list_documents(), ()),
+    "web": (lambda args: start_web_ui(), ()),
+    "interactive": (lambda args: start_interactive(), ()),
+}
+
+def _fast_dispatch(argv):
+    """Run a simple command line directly, returning False if it needs argparse"""
+    if not argv or argv[0] not in _FAST_COMMANDS:
+        return False
+    
+    handler, options = _FAST_COMMANDS[argv[0]]
+    args = argv[1:]
+    if options is None:
+        # Positional arguments only; options or an empty list need the parser
+        if not args or any(arg.startswith("-") for arg in args):
+            return False
+    elif any(arg not in options for arg in args):
+        return False
+    
+    handler(args)
+    return True
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    
+    # Skip building the parser for the common, well-formed commands
+    if _fast_dispatch(argv):
+        return
+    
+    import argparse
     parser = argparse.ArgumentParser(description="Reflexia RAG Helper")
     subparsers = parser.add_subparsers(dest="command", help="Command to run")
     
@@ -184,8 +325,8 @@ def main():
     start_parser.add_argument("--no-interactive", action="store_true", help="Don't use interactive mode")
     
     # Add document command
-    add_parser = subparsers.add_parser("add", help="Add document to RAG database")
-    add_parser.add_argument("filepath", help="Path to document file")
+    add_parser = subparsers.add_parser("add", help="Add documents to RAG database")
+    add_parser.add_argument("filepaths", nargs="+", help="Paths to document files (indexed together)")
     
     # List documents command
     list_parser = subparsers.add_parser("list", help="List documents in RAG database")
@@ -193,7 +334,10 @@ def main():
     # Web command
     web_parser = subparsers.add_parser("web", help="Start Reflexia with Web UI and RAG")
     
-    args = parser.parse_args()
+    # Interactive command
+    subparsers.add_parser("interactive", help="Start Reflexia in interactive RAG mode")
+    
+    args = parser.parse_args(argv)
     
     if args.command == "fix":
         fix_rag()
@@ -201,7 +345,7 @@ def main():
         interactive = not args.no_interactive
         start_rag(interactive=interactive, web=args.web)
     elif args.command == "add":
-        add_document(args.filepath)
+        add_documents(args.filepaths)
     elif args.command == "list":
         list_documents()
     elif args.command == "web":
@@ -17,10 +17,18 @@ import os
 import sys
 import time
 import logging
-import json
+import hashlib
+import io
+import mmap
+import sqlite3
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Optional, Any, Union, Tuple
 
+from json_utils import convert_dataset_directory
+
 # Force CPU for embeddings to avoid Metal issues on Apple Silicon
 os.environ['TOKENIZERS_PARALLELISM'] = 'false'
 os.environ['CUDA_VISIBLE_DEVICES'] = ''
@@ -28,6 +36,128 @@ os.environ['USE_MPS'] = '0'
 
 logger = logging.getLogger("reflexia-tools.rag")
 
+# Embedding functions shared by every RAGManager, keyed by (backend, model)
+_EMBEDDING_FUNCTIONS = {}
+_EMBEDDING_FUNCTIONS_LOCK = threading.Lock()
+
+# Threads used to read and chunk files in load_files
+LOAD_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Text files at least this large are decoded straight from a memory map
+MMAP_READ_THRESHOLD = 16 * 1024 * 1024
+
+def _read_text_file(file_path: Path) -> str:
+    """Read a UTF-8 text file with universal newlines
+    
+    Large files are memory-mapped and decoded in one step, so the raw bytes
+    are never copied into a separate bytes object alongside the text.
+    """
+    if file_path.stat().st_size < MMAP_READ_THRESHOLD:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    
+    with open(file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            text = str(mm, 'utf-8')
+    
+    # Match the newline translation of text mode
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+# NumPy converts result distances in one vectorized pass when installed
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+def _similarities(distances):
+    """Convert cosine distances (0 to 2) into similarities (1 to 0)"""
+    if np is not None:
+        return (1.0 - np.asarray(distances, dtype=np.float64) / 2.0).tolist()
+    return [1.0 - distance / 2.0 for distance in distances]
+
+# System prompt pieces for RAG answers
+RAG_DEFAULT_SYSTEM_PROMPT = "You are a helpful assistant that answers based on the provided context."
+RAG_SYSTEM_INSTRUCTIONS = ("\nAnswer the question based on the context provided. "
+                           "If the context doesn't contain relevant information, say so.")
+
+# Chunk separators, coarsest first; "" falls back to fixed-size cuts
+_SEPARATORS = ("\n\n", "\n", ". ", " ", "")
+
+class CachedEmbeddingFunction:
+    """Embedding function wrapper that caches vectors by content hash
+    
+    Vectors are stored as float32 bytes in a SQLite file, keyed by a hash of
+    the model name and text, so re-ingested or repeated chunks are never
+    sent to the model twice.
+    """
+    
+    # SQLite allows at most 999 bound parameters per statement
+    LOOKUP_BATCH = 500
+    
+    def __init__(self, embedding_function, cache_path: Union[str, Path], model_name: str):
+        """Initialize the cache
+        
+        Args:
+            embedding_function: Embedding function to wrap
+            cache_path: SQLite file holding cached vectors
+            model_name: Model identity mixed into every key
+        """
+        self.embedding_function = embedding_function
+        self.model_name = model_name
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(cache_path), check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL)")
+        self._db.commit()
+    
+    def __getattr__(self, name):
+        # Expose the wrapped function's attributes (name, config, ...) to Chroma
+        if name == "embedding_function":
+            raise AttributeError(name)
+        return getattr(self.embedding_function, name)
+    
+    def _key(self, text: str) -> bytes:
+        digest = hashlib.blake2b(self.model_name.encode("utf-8"), digest_size=16)
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8"))
+        return digest.digest()
+    
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        """Embed texts, computing only those not already cached"""
+        keys = [self._key(text) for text in input]
+        
+        with self._lock:
+            cached = {}
+            unique_keys = list(dict.fromkeys(keys))
+            for i in range(0, len(unique_keys), self.LOOKUP_BATCH):
+                batch = unique_keys[i:i + self.LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                )
+                for key, vector in rows:
+                    cached[key] = array("f", vector).tolist()
+        
+        missing = {}
+        for key, text in zip(keys, input):
+            if key not in cached:
+                missing.setdefault(key, text)
+        
+        if missing:
+            vectors = self.embedding_function(list(missing.values()))
+            rows = []
+            for key, vector in zip(missing, vectors):
+                vector = array("f", vector)
+                cached[key] = vector.tolist()
+                rows.append((key, vector.tobytes()))
+            with self._lock:
+                self._db.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+                self._db.commit()
+        
+        logger.debug(f"Embedding cache: {len(input) - len(missing)} hits, {len(missing)} misses")
+        return [cached[key] for key in keys]
+
 class RAGManager:
     """RAG Manager for Reflexia LLM"""
     
@@ -43,9 +173,18 @@ class RAGManager:
         
         # Get configuration
         self.chunk_size = config.get("rag", "chunk_size", default=1000)
-        self.chunk_overlap = config.get("rag", "chunk_overlap", default=200)
+        self.chunk_overlap = config.get("rag", "chunk_overlap", default=0)
         self.similarity_top_k = config.get("rag", "similarity_top_k", default=3)
         self.embedding_model = config.get("rag", "embedding_model", default="all-MiniLM-L6-v2")
+        self.embedding_batch_size = max(1, config.get("rag", "embedding_batch_size", default=64))
+        self.embedding_backend = config.get("rag", "embedding_backend", default="sentence-transformers")
+        self.embedding_cache = config.get("rag", "embedding_cache", default=True)
+        self.query_backend = config.get("rag", "query_backend", default="chroma")
+        
+        # Collection handles, FAISS indexes and stored ids by name, built lazily
+        self._collections = {}
+        self._faiss_indexes = {}
+        self._collection_ids = {}
         
         # Vector database path
         self.vector_db_path = Path(config.get("paths", "vector_db_dir", default="vector_db"))
@@ -70,10 +209,13 @@ class RAGManager:
             
             # Initialize embedding function
             logger.info(f"Using {self.embedding_model} for embeddings")
-            self.embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-                model_name=self.embedding_model,
-                device="cpu"  # Force CPU for Apple Silicon compatibility
-            )
+            self.embedding_function = self._shared_embedding_function(embedding_functions)
+            if self.embedding_cache:
+                self.embedding_function = CachedEmbeddingFunction(
+                    self.embedding_function,
+                    self.vector_db_path / "embedding_cache.sqlite3",
+                    f"{self.embedding_backend}:{self.embedding_model}"
+                )
             
             logger.info(f"Vector database initialized at {self.vector_db_path}")
             return True
@@ -89,10 +231,107 @@ class RAGManager:
             self.embedding_function = None
             return False
     
+    def _shared_embedding_function(self, embedding_functions):
+        """Get the process-wide embedding function for the configured model
+        
+        Every RAGManager with the same backend and model shares one
+        embedding function, so the model weights are loaded only once.
+        
+        Args:
+            embedding_functions: chromadb.utils.embedding_functions module
+            
+        Returns:
+            Chroma-compatible embedding function
+        """
+        key = (self.embedding_backend, self.embedding_model)
+        with _EMBEDDING_FUNCTIONS_LOCK:
+            embedding_function = _EMBEDDING_FUNCTIONS.get(key)
+            if embedding_function is None:
+                embedding_function = self._create_embedding_function(embedding_functions)
+                _EMBEDDING_FUNCTIONS[key] = embedding_function
+        return embedding_function
+    
+    def _create_embedding_function(self, embedding_functions):
+        """Create the embedding function for the configured backend
+        
+        The "onnx" backend uses Chroma's bundled ONNX Runtime build of
+        all-MiniLM-L6-v2, which skips the PyTorch stack entirely. It falls
+        back to sentence-transformers for other models or when onnxruntime
+        and tokenizers are not installed.
+        
+        Args:
+            embedding_functions: chromadb.utils.embedding_functions module
+            
+        Returns:
+            Chroma-compatible embedding function
+        """
+        if self.embedding_backend == "onnx":
+            if self.embedding_model.split("/")[-1] != "all-MiniLM-L6-v2":
+                logger.warning(f"ONNX embeddings only support all-MiniLM-L6-v2, not {self.embedding_model}; "
+                               "using sentence-transformers")
+            else:
+                try:
+                    return embedding_functions.ONNXMiniLM_L6_V2(preferred_providers=["CPUExecutionProvider"])
+                except (AttributeError, ValueError) as e:
+                    logger.warning(f"ONNX embeddings unavailable ({e}); using sentence-transformers")
+        
+        return embedding_functions.SentenceTransformerEmbeddingFunction(
+            model_name=self.embedding_model,
+            device="cpu"  # Force CPU for Apple Silicon compatibility
+        )
+    
     def is_available(self) -> bool:
         """Check if RAG is available"""
         return self.chroma_client is not None and self.embedding_function is not None
     
+    def _get_collection(self, name: str, create: bool = False):
+        """Get a collection handle, resolving it only on first use
+        
+        Args:
+            name: Collection name
+            create: Create the collection if it does not exist
+            
+        Returns:
+            Chroma collection
+            
+        Raises:
+            Exception: If the collection does not exist and create is False
+        """
+        collection = self._collections.get(name)
+        if collection is None:
+            if create:
+                collection = self.chroma_client.get_or_create_collection(
+                    name=name,
+                    embedding_function=self.embedding_function,
+                    metadata={"description": "Documents for RAG"}
+                )
+            else:
+                collection = self.chroma_client.get_collection(
+                    name=name,
+                    embedding_function=self.embedding_function
+                )
+            self._collections[name] = collection
+        return collection
+    
+    def _existing_ids(self, name: str, collection) -> set:
+        """Get the ids stored in a collection, fetching them on first use
+        
+        The set is kept up to date by add_documents, so later calls need
+        no round trip to the database.
+        
+        Args:
+            name: Collection name
+            collection: Chroma collection
+            
+        Returns:
+            Set of document ids
+        """
+        ids = self._collection_ids.get(name)
+        if ids is None:
+            ids = set(collection.get(include=[])["ids"])
+            self._collection_ids[name] = ids
+        return ids
+    
     def add_documents(self, documents: List[Dict[str, Any]]) -> bool:
         """Add documents to the vector database
         
@@ -106,20 +345,10 @@ class RAGManager:
             logger.error("Vector database is not available")
             return False
         
+        collection_name = "documents"
         try:
             # Get or create collection
-            collection_name = "documents"
-            try:
-                collection = self.chroma_client.get_collection(
-                    name=collection_name,
-                    embedding_function=self.embedding_function
-                )
-            except Exception:
-                collection = self.chroma_client.create_collection(
-                    name=collection_name,
-                    embedding_function=self.embedding_function,
-                    metadata={"description": "Documents for RAG"}
-                )
+            collection = self._get_collection(collection_name, create=True)
             
             # Prepare documents for insertion
             texts = []
@@ -131,22 +360,59 @@ class RAGManager:
                 ids.append(doc.get("id", f"doc_{len(texts)}"))
                 metadatas.append(doc.get("metadata", {}))
             
-            # Add to collection
-            collection.add(
-                documents=texts,
-                ids=ids,
-                metadatas=metadatas
-            )
+            # Skip documents whose ids the collection already holds; Chroma
+            # would ignore them anyway, but only after embedding them
+            existing_ids = self._existing_ids(collection_name, collection)
+            keep = [i for i, doc_id in enumerate(ids) if doc_id not in existing_ids]
+            if len(keep) < len(ids):
+                logger.info(f"Skipping {len(ids) - len(keep)} documents already in collection '{collection_name}'")
+                texts = [texts[i] for i in keep]
+                ids = [ids[i] for i in keep]
+                metadatas = [metadatas[i] for i in keep]
+            
+            # Sort by length so each embedding batch holds texts of similar
+            # length and little of the batch is padding; identical texts
+            # end up next to each other
+            order = sorted(range(len(texts)), key=lambda i: (len(texts[i]), texts[i]))
+            texts = [texts[i] for i in order]
+            ids = [ids[i] for i in order]
+            metadatas = [metadatas[i] for i in order]
+            
+            # Add to collection in fixed-size batches, so each embedding
+            # call sees a bounded batch and large ingests stay under the
+            # client's maximum batch size. Each distinct text in a batch is
+            # embedded once and its vector reused for duplicates.
+            batch_size = self.embedding_batch_size
+            for i in range(0, len(texts), batch_size):
+                batch_texts = texts[i:i + batch_size]
+                unique_texts = list(dict.fromkeys(batch_texts))
+                vectors = dict(zip(unique_texts, self.embedding_function(unique_texts)))
+                collection.add(
+                    documents=batch_texts,
+                    embeddings=[vectors[text] for text in batch_texts],
+                    ids=ids[i:i + batch_size],
+                    metadatas=metadatas[i:i + batch_size]
+                )
+                existing_ids.update(ids[i:i + batch_size])
             
+            self._faiss_indexes.pop(collection_name, None)
             logger.info(f"Added {len(texts)} documents to collection '{collection_name}'")
             return True
         except Exception as e:
             logger.error(f"Error adding documents to vector database: {e}")
+            self._collections.pop(collection_name, None)
+            self._faiss_indexes.pop(collection_name, None)
+            self._collection_ids.pop(collection_name, None)
             return False
     
     def chunk_text(self, text: str) -> List[str]:
         """Chunk text into smaller pieces
         
+        Text is split recursively on paragraph breaks, then line breaks,
+        sentence ends, words and finally characters, and adjacent pieces are
+        merged back up to chunk_size. Consecutive chunks share up to
+        chunk_overlap characters of trailing pieces.
+        
         Args:
             text: Text to chunk
             
@@ -156,67 +422,144 @@ class RAGManager:
         if not text.strip():
             return []
         
+        return self._merge_pieces(self._recursive_split(text, _SEPARATORS))
+    
+    def _recursive_split(self, text: str, separators: Tuple[str, ...]) -> List[str]:
+        """Split text into pieces no longer than chunk_size
+        
+        Separators stay attached to the end of the piece before them, so
+        joining the pieces gives back the original text.
+        
+        Args:
+            text: Text to split
+            separators: Separators to try, coarsest first
+            
+        Returns:
+            List of text pieces
+        """
+        if len(text) <= self.chunk_size:
+            return [text]
+        
+        separator = separators[0]
+        if not separator:
+            # Nothing left to split on; cut at chunk_size
+            return [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+        
+        parts = text.split(separator)
+        pieces = []
+        for i, part in enumerate(parts):
+            if i < len(parts) - 1:
+                part += separator
+            if part:
+                pieces.extend(self._recursive_split(part, separators[1:]))
+        return pieces
+    
+    def _merge_pieces(self, pieces: List[str]) -> List[str]:
+        """Greedily merge adjacent pieces into chunks of up to chunk_size
+        
+        Args:
+            pieces: Text pieces, each no longer than chunk_size
+            
+        Returns:
+            List of text chunks
+        """
         chunks = []
-        start = 0
-        text_length = len(text)
-        
-        while start < text_length:
-            # Find a good chunk end (preferably at paragraph or sentence)
-            end = min(start + self.chunk_size, text_length)
-            
-            # If not at the end of text, try to find a good breakpoint
-            if end < text_length:
-                # Try to break at paragraph
-                paragraph_end = text.rfind("\n\n", start, end)
-                if paragraph_end > start + self.chunk_size // 2:
-                    end = paragraph_end + 2
-                else:
-                    # Try to break at sentence (period + space)
-                    sentence_end = text.rfind(". ", start, end)
-                    if sentence_end > start + self.chunk_size // 2:
-                        end = sentence_end + 2
-            
-            # Add the chunk
-            chunks.append(text[start:end])
-            
-            # Move start position, with overlap
-            start = end - self.chunk_overlap
-            if start <= 0 or start >= text_length:
-                break
+        current = []
+        current_length = 0
+        
+        for piece in pieces:
+            if current and current_length + len(piece) > self.chunk_size:
+                chunks.append("".join(current))
+                
+                # Carry trailing pieces into the next chunk as overlap
+                while current and (current_length > self.chunk_overlap
+                                   or current_length + len(piece) > self.chunk_size):
+                    current_length -= len(current.pop(0))
+            
+            current.append(piece)
+            current_length += len(piece)
+        
+        if current:
+            chunks.append("".join(current))
         
         return chunks
     
     def load_file(self, file_path: Union[str, Path], metadata: Dict[str, Any] = None) -> bool:
         """Load a file into the vector database"""
+        return self.load_files([file_path], metadata)
+    
+    def load_files(self, file_paths: List[Union[str, Path]], metadata: Dict[str, Any] = None) -> bool:
+        """Load several files into the vector database with a single insert
+        
+        Args:
+            file_paths: Files to load
+            metadata: Extra metadata added to every chunk (optional)
+            
+        Returns:
+            bool: Success status; nothing is added if any file fails to load
+        """
+        # Read and chunk files concurrently; file reads and PDF parsing
+        # release the GIL
+        workers = min(LOAD_WORKERS, len(file_paths))
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                loaded = list(executor.map(lambda path: self._file_documents(path, metadata), file_paths))
+        else:
+            loaded = [self._file_documents(path, metadata) for path in file_paths]
+        
+        documents = []
+        for file_documents in loaded:
+            if file_documents is None:
+                return False
+            documents.extend(file_documents)
+        
+        # Add to vector database (one embedding batch for all files)
+        success = self.add_documents(documents)
+        
+        if success:
+            logger.info(f"Loaded {len(file_paths)} files into vector database ({len(documents)} chunks)")
+            return True
+        else:
+            logger.error(f"Failed to add documents to vector database")
+            return False
+    
+    def _file_documents(self, file_path: Union[str, Path],
+                        metadata: Dict[str, Any] = None) -> Optional[List[Dict[str, Any]]]:
+        """Read and chunk a file into documents for the vector database
+        
+        Args:
+            file_path: File to read
+            metadata: Extra metadata added to every chunk (optional)
+            
+        Returns:
+            List of documents, or None if the file could not be read
+        """
         try:
             file_path = Path(file_path)
             
             if not file_path.exists():
                 logger.error(f"File not found: {file_path}")
-                return False
+                return None
             
             # Basic file type handling
             suffix = file_path.suffix.lower()
             
             if suffix in ['.txt', '.md', '.py', '.js', '.html', '.css', '.json']:
                 # Simple text files
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    text = f.read()
+                text = _read_text_file(file_path)
             elif suffix in ['.pdf']:
                 try:
                     import fitz  # PyMuPDF
                     doc = fitz.open(file_path)
-                    text = ""
-                    for page in doc:
-                        text += page.get_text()
+                    text = "".join([page.get_text("text") for page in doc])
                     doc.close()
                 except ImportError:
                     logger.error("PDF support requires PyMuPDF. Install with: pip install pymupdf")
                     print("PDF support requires additional libraries. Install with: pip install pymupdf")
-                    return False
+                    return None
             else:
                 logger.error(f"Unsupported file type: {suffix}")
-                return False
+                return None
             
             # Create base metadata
             base_metadata = {
@@ -233,32 +576,27 @@ class RAGManager:
             # Chunk the text
             chunks = self.chunk_text(text)
             
-            # Prepare documents
-            documents = []
-            for i, chunk in enumerate(chunks):
-                chunk_metadata = base_metadata.copy()
-                chunk_metadata["chunk_id"] = i
-                chunk_metadata["chunk_total"] = len(chunks)
-                
-                documents.append({
-                    "id": f"{file_path.stem}-{i}",
+            # Prepare documents; each chunk's metadata is built in one step
+            # from the shared base instead of copied and then updated. Ids
+            # use the resolved path, so notes.md and notes.pdf (or two files
+            # named notes.md) never share one, and a file gets the same ids
+            # however the caller spelled its path.
+            chunk_total = len(chunks)
+            resolved_path = file_path.resolve()
+            documents = [
+                {
+                    "id": f"{resolved_path}-{i}",
                     "text": chunk,
-                    "metadata": chunk_metadata
-                })
-            
-            # Add to vector database
-            success = self.add_documents(documents)
+                    "metadata": {**base_metadata, "chunk_id": i, "chunk_total": chunk_total}
+                }
+                for i, chunk in enumerate(chunks)
+            ]
             
-            if success:
-                logger.info(f"Loaded {file_path} into vector database ({len(chunks)} chunks)")
-                return True
-            else:
-                logger.error(f"Failed to add documents to vector database")
-                return False
+            return documents
                 
         except Exception as e:
             logger.error(f"Error loading file {file_path}: {e}")
-            return False
+            return None
     
     def query(self, query_text: str, collection_name: str = "documents", 
              n_results: int = None, filter_criteria: Dict = None) -> List[Dict]:
@@ -266,19 +604,14 @@ class RAGManager:
         try:
             # Try to get the requested collection
             try:
-                collection = self.chroma_client.get_collection(
-                    name=collection_name,
-                    embedding_function=self.embedding_function
-                )
+                collection = self._get_collection(collection_name)
                 logger.info(f"Using collection: {collection_name}")
             except Exception:
                 # Try alternative collection name as fallback
                 fallback_name = "default" if collection_name == "documents" else "documents"
                 try:
-                    collection = self.chroma_client.get_collection(
-                        name=fallback_name,
-                        embedding_function=self.embedding_function
-                    )
+                    collection = self._get_collection(fallback_name)
+                    collection_name = fallback_name
                     logger.info(f"Using fallback collection: {fallback_name}")
                 except Exception as e:
                     logger.error(f"No collections found: {e}")
@@ -288,12 +621,21 @@ class RAGManager:
             if n_results is None:
                 n_results = self.similarity_top_k
             
-            # Query the collection
-            results = collection.query(
-                query_texts=[query_text],
-                n_results=n_results,
-                where=filter_criteria
-            )
+            # Query the collection; FAISS serves unfiltered queries when enabled
+            results = None
+            if self.query_backend == "faiss" and not filter_criteria:
+                try:
+                    results = self._faiss_query(collection, collection_name, query_text, n_results)
+                except ImportError as e:
+                    logger.warning(f"FAISS queries unavailable ({e}); using Chroma. Install with: pip install faiss-cpu")
+                    self.query_backend = "chroma"
+            
+            if results is None:
+                results = collection.query(
+                    query_texts=[query_text],
+                    n_results=n_results,
+                    where=filter_criteria
+                )
             
             # Format results
             formatted_results = []
@@ -302,16 +644,14 @@ class RAGManager:
                 metadatas = results.get("metadatas", [[]])[0] if results.get("metadatas") else []
                 distances = results.get("distances", [[]])[0] if results.get("distances") else []
                 
-                for i, doc in enumerate(docs):
-                    metadata = metadatas[i] if i < len(metadatas) else {}
-                    distance = distances[i] if i < len(distances) else 1.0
-                    similarity = 1.0 - distance/2.0
-                    
-                    formatted_results.append({
-                        "text": doc,
-                        "metadata": metadata,
-                        "similarity": similarity
-                    })
+                # Missing metadata and distances default to {} and 1.0
+                metadatas = list(metadatas[:len(docs)]) + [{} for _ in range(len(docs) - len(metadatas))]
+                distances = list(distances[:len(docs)]) + [1.0] * (len(docs) - len(distances))
+                
+                formatted_results = [
+                    {"text": doc, "metadata": metadata, "similarity": similarity}
+                    for doc, metadata, similarity in zip(docs, metadatas, _similarities(distances))
+                ]
                 
                 logger.info(f"Found {len(formatted_results)} relevant documents")
             else:
@@ -321,8 +661,58 @@ class RAGManager:
             
         except Exception as e:
             logger.error(f"Error querying vector database: {e}")
+            self._collections.clear()
+            self._faiss_indexes.clear()
+            self._collection_ids.clear()
             return []
     
+    def _faiss_query(self, collection, collection_name: str, query_text: str, n_results: int) -> Dict:
+        """Query a collection through an in-memory FAISS index
+        
+        The index holds the collection's normalized embeddings, so inner
+        product is cosine similarity. It is built from the collection on
+        first use and dropped when this manager adds documents to it.
+        
+        Args:
+            collection: Chroma collection to index
+            collection_name: Name the index is cached under
+            query_text: Query text
+            n_results: Number of results
+            
+        Returns:
+            Results in the shape of Chroma's collection.query
+            
+        Raises:
+            ImportError: If faiss or numpy is not installed
+        """
+        import numpy
+        import faiss
+        
+        cached = self._faiss_indexes.get(collection_name)
+        if cached is None:
+            data = collection.get(include=["embeddings", "documents", "metadatas"])
+            embeddings = numpy.asarray(data["embeddings"], dtype=numpy.float32)
+            if not len(embeddings):
+                return {"documents": [[]], "metadatas": [[]], "distances": [[]]}
+            faiss.normalize_L2(embeddings)
+            index = faiss.IndexFlatIP(embeddings.shape[1])
+            index.add(embeddings)
+            cached = (index, data["documents"], data["metadatas"])
+            self._faiss_indexes[collection_name] = cached
+        
+        index, documents, metadatas = cached
+        query_embedding = numpy.asarray(self.embedding_function([query_text]), dtype=numpy.float32)
+        faiss.normalize_L2(query_embedding)
+        scores, positions = index.search(query_embedding, min(n_results, index.ntotal))
+        hits = [(int(position), float(score)) for position, score in zip(positions[0], scores[0]) if position >= 0]
+        
+        # Report squared L2 distances between unit vectors, as Chroma does
+        return {
+            "documents": [[documents[position] for position, _ in hits]],
+            "metadatas": [[metadatas[position] for position, _ in hits]],
+            "distances": [[2.0 - 2.0 * score for _, score in hits]]
+        }
+    
     def generate_rag_response(self, query_text: str, system_prompt: str = None,
                             collection_name: str = "documents") -> Dict:
         """Generate a response using RAG
@@ -353,22 +743,27 @@ class RAGManager:
                     "context_docs": []
                 }
             
-            # 2. Prepare context
-            context_text = "\n\n".join([f"Context {i+1}:\n{doc['text']}" for i, doc in enumerate(context_docs)])
-            
-            # 3. Create a RAG prompt
-            rag_system_prompt = system_prompt or "You are a helpful assistant that answers based on the provided context."
-            rag_system_prompt += "\nAnswer the question based on the context provided. If the context doesn't contain relevant information, say so."
-            
-            rag_prompt = f"Context Information:\n{context_text}\n\nQuestion: {query_text}\n\nAnswer:"
-            
-            # 4. Generate response
+            # 2. Create a RAG prompt, writing each context straight into it
+            # rather than joining the contexts into a string of their own
+            rag_system_prompt = (system_prompt or RAG_DEFAULT_SYSTEM_PROMPT) + RAG_SYSTEM_INSTRUCTIONS
+            
+            buf = io.StringIO()
+            buf.write("Context Information:\n")
+            for i, doc in enumerate(context_docs):
+                if i:
+                    buf.write("\n\n")
+                buf.write(f"Context {i + 1}:\n")
+                buf.write(doc['text'])
+            buf.write(f"\n\nQuestion: {query_text}\n\nAnswer:")
+            rag_prompt = buf.getvalue()
+            
+            # 3. Generate response
             response = self.model_manager.generate_response(
                 rag_prompt,
                 system_prompt=rag_system_prompt
             )
             
-            # 5. Prepare result with sources
+            # 4. Prepare result with sources
             sources = []
             for doc in context_docs:
                 if "metadata" in doc and "source" in doc["metadata"]:
@@ -410,34 +805,4 @@ class RAGManager:
     
     def _process_dataset_directory(self, dir_path, output_file):
         """Process a directory of dataset files"""
-        with open(output_file, 'w') as f_out:
-            # Process each JSON or JSONL file
-            for file_path in dir_path.glob('**/*.json*'):
-                try:
-                    with open(file_path, 'r') as f_in:
-                        # Determine file format
-                        if file_path.suffix == '.json':
-                            # JSON array
-                            data = json.load(f_in)
-                            
-                            for item in data:
-                                prompt = item.get('instruction', item.get('prompt', item.get('input', '')))
-                                response = item.get('output', item.get('response', item.get('completion', '')))
-                                
-                                if prompt and response:
-                                    example = {"prompt": prompt, "response": response}
-                                    f_out.write(json.dumps(example) + '\n')
-                        
-                        elif file_path.suffix == '.jsonl':
-                            # JSONL format
-                            for line in f_in:
-                                if line.strip():
-                                    item = json.loads(line)
-                                    prompt = item.get('instruction', item.get('prompt', item.get('input', '')))
-                                    response = item.get('output', item.get('response', item.get('completion', '')))
-                                    
-                                    if prompt and response:
-                                        example = {"prompt": prompt, "response": response}
-                                        f_out.write(json.dumps(example) + '\n')
-                except Exception as e:
-                    logger.warning(f"Error processing file {file_path}: {e}")
+        convert_dataset_directory(dir_path, output_file)
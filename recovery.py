@@ -21,6 +21,14 @@ from functools import wraps
 logger = logging.getLogger("reflexia-tools.recovery")
 
 
+class CircuitOpenError(Exception):
+    """Raised when a call is blocked by an open circuit breaker."""
+
+    def __init__(self, name):
+        super().__init__(f"Service unavailable: circuit breaker '{name}' open")
+        self.name = name
+
+
 class CircuitBreaker:
     """Circuit breaker pattern implementation to prevent cascading failures.
 
@@ -50,37 +58,49 @@ class CircuitBreaker:
         self.recovery_timeout = recovery_timeout
         self.failure_count_timeout = failure_count_timeout
 
+        # Timeouts as integer nanoseconds, compared against time.monotonic_ns()
+        self.recovery_timeout_ns = int(recovery_timeout * 1_000_000_000)
+        self.failure_count_timeout_ns = int(failure_count_timeout * 1_000_000_000)
+
         # State management
         self.state = self.CLOSED
         self.failure_count = 0
-        self.last_failure_time = 0
-        self.open_time = 0
+        self.last_failure_time_ns = 0
+        self.open_time_ns = 0
+
+        # Guards failure counting and state transitions; successful calls
+        # in the closed state never take it
+        self._lock = threading.Lock()
 
         logger.info(f"Circuit breaker '{name}' initialized")
 
     def record_failure(self):
         """Record a failure and potentially open the circuit."""
-        current_time = time.time()
+        with self._lock:
+            current_time = time.monotonic_ns()
 
-        # Reset failure count if enough time has passed since last failure
-        if current_time - self.last_failure_time > self.failure_count_timeout:
-            self.failure_count = 0
+            # Reset failure count if enough time has passed since last failure
+            if current_time - self.last_failure_time_ns > self.failure_count_timeout_ns:
+                self.failure_count = 0
 
-        self.failure_count += 1
-        self.last_failure_time = current_time
+            self.failure_count += 1
+            self.last_failure_time_ns = current_time
 
-        # Open circuit if threshold reached
-        if self.state == self.CLOSED and self.failure_count >= self.failure_threshold:
-            self.state = self.OPEN
-            self.open_time = current_time
-            logger.warning(f"Circuit breaker '{self.name}' OPENED after {self.failure_count} failures")
+            # Open circuit if threshold reached
+            if self.state == self.CLOSED and self.failure_count >= self.failure_threshold:
+                self.state = self.OPEN
+                self.open_time_ns = current_time
+                logger.warning(f"Circuit breaker '{self.name}' OPENED after {self.failure_count} failures")
 
     def record_success(self):
         """Record a success and potentially close the circuit."""
+        # Unlocked read; only the half-open to closed transition takes the lock
         if self.state == self.HALF_OPEN:
-            self.state = self.CLOSED
-            self.failure_count = 0
-            logger.info(f"Circuit breaker '{self.name}' CLOSED after successful test")
+            with self._lock:
+                if self.state == self.HALF_OPEN:
+                    self.state = self.CLOSED
+                    self.failure_count = 0
+                    logger.info(f"Circuit breaker '{self.name}' CLOSED after successful test")
 
     def allow_request(self):
         """Check if request should be allowed through.
@@ -88,14 +108,15 @@ class CircuitBreaker:
         Returns:
             bool: True if request should be allowed, False otherwise
         """
-        current_time = time.time()
-
-        # Check if circuit is open
+        # Check if circuit is open; closed and half-open need no clock read
+        # and no lock
         if self.state == self.OPEN:
             # Check if recovery timeout has elapsed
-            if current_time - self.open_time > self.recovery_timeout:
-                self.state = self.HALF_OPEN
-                logger.info(f"Circuit breaker '{self.name}' entering HALF-OPEN state for testing")
+            if time.monotonic_ns() - self.open_time_ns > self.recovery_timeout_ns:
+                with self._lock:
+                    if self.state == self.OPEN:
+                        self.state = self.HALF_OPEN
+                        logger.info(f"Circuit breaker '{self.name}' entering HALF-OPEN state for testing")
                 return True
             return False
 
@@ -112,20 +133,27 @@ def circuit_breaker(breaker):
     Returns:
         Decorated function with circuit breaker protection
     """
+    # Bind breaker methods once so each call skips the attribute lookups
+    allow_request = breaker.allow_request
+    record_success = breaker.record_success
+    record_failure = breaker.record_failure
+
     def decorator(func):
+        func_name = func.__name__
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            if not breaker.allow_request():
-                logger.warning(f"Circuit breaker '{breaker.name}' prevented call to {func.__name__}")
-                raise Exception(f"Service unavailable: circuit breaker '{breaker.name}' open")
+            if not allow_request():
+                logger.warning(f"Circuit breaker '{breaker.name}' prevented call to {func_name}")
+                raise CircuitOpenError(breaker.name)
 
             try:
                 result = func(*args, **kwargs)
-                breaker.record_success()
-                return result
             except Exception:
-                breaker.record_failure()
+                record_failure()
                 raise
+            record_success()
+            return result
         return wrapper
     return decorator
 
@@ -19,10 +19,24 @@ rendering issues on macOS.
 import os
 import sys
 import platform
+import shlex
+import shutil
+import struct
+import functools
 import subprocess
 import argparse
 from pathlib import Path
 
+# Shells the launcher can run through, in order of preference
+SUPPORTED_SHELLS = ('zsh', 'bash', 'sh')
+
+# Launcher options that are not passed on to main.py
+_WRAPPER_FLAGS = frozenset(('--force-shell', '--force-direct'))
+
+# sysctl names for reading another process's arguments on macOS
+CTL_KERN = 1
+KERN_PROCARGS2 = 49
+
 def is_powershell():
     """Detect if running in PowerShell terminal on macOS"""
     if platform.system() != 'Darwin':
@@ -32,74 +46,131 @@ def is_powershell():
     if 'powershell' in term_program.lower():
         return True
     
-    # Additional check for PowerShell
+    # Additional check for PowerShell: the parent process often reveals
+    # the actual terminal
+    if 'powershell' in _process_command(os.getppid()).lower():
+        return True
+    
+    return False
+
+def _process_command(pid):
+    """Read a process's command line without spawning ps
+    
+    Uses sysctl(KERN_PROCARGS2) on macOS and /proc/<pid>/cmdline elsewhere.
+    Returns an empty string if the command line can't be read.
+    """
     try:
-        # Check parent process - this often reveals the actual terminal
-        parent_pid = os.getppid()
-        result = subprocess.run(
-            ['ps', '-p', str(parent_pid), '-o', 'command='],
-            capture_output=True, text=True, timeout=1
-        )
-        if 'powershell' in result.stdout.lower():
-            return True
+        if platform.system() == 'Darwin':
+            import ctypes
+            import ctypes.util
+            
+            libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            mib = (ctypes.c_int * 3)(CTL_KERN, KERN_PROCARGS2, pid)
+            size = ctypes.c_size_t(0)
+            if libc.sysctl(mib, 3, None, ctypes.byref(size), None, 0) != 0:
+                return ''
+            buf = ctypes.create_string_buffer(size.value)
+            if libc.sysctl(mib, 3, buf, ctypes.byref(size), None, 0) != 0:
+                return ''
+            return _procargs_command(buf.raw[:size.value])
+        else:
+            with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                raw = f.read()
     except Exception:
-        pass
+        return ''
     
-    return False
+    return ' '.join(part for part in raw.decode('utf-8', 'replace').split('\0') if part)
 
+def _procargs_command(raw):
+    """Join the arguments from a KERN_PROCARGS2 buffer, like ps -o command=
+    
+    The buffer holds argc, the executable path and its NUL padding, the
+    argc arguments, and then the environment, which is left out.
+    """
+    if len(raw) < 4:
+        return ''
+    argc, = struct.unpack('i', raw[:4])
+    
+    # Skip the executable path and the NULs padding it
+    start = raw.find(b'\0', 4)
+    if start < 0:
+        return ''
+    while start < len(raw) and raw[start] == 0:
+        start += 1
+    
+    args = raw[start:].split(b'\0', argc)[:argc]
+    return ' '.join(arg.decode('utf-8', 'replace') for arg in args)
+
+@functools.lru_cache(maxsize=1)
 def find_shell():
-    """Find available shell on the system (zsh preferred, bash as fallback)"""
+    """Find available shell on the system (zsh preferred, bash as fallback)
+    
+    The user's $SHELL is used first when it is zsh, bash or sh.
+    """
+    user_shell = os.environ.get('SHELL', '')
+    if os.path.basename(user_shell) in SUPPORTED_SHELLS and os.path.exists(user_shell):
+        return user_shell
+    
     shells = ['/bin/zsh', '/bin/bash', '/bin/sh']
     for shell in shells:
         if os.path.exists(shell):
             return shell
     
     # Fallback to 'zsh' or 'bash' in PATH
-    for shell in ['zsh', 'bash', 'sh']:
-        try:
-            result = subprocess.run(['which', shell], capture_output=True, text=True)
-            if result.returncode == 0 and result.stdout.strip():
-                return result.stdout.strip()
-        except Exception:
-            pass
+    for shell in SUPPORTED_SHELLS:
+        shell_path = shutil.which(shell)
+        if shell_path:
+            return shell_path
     
     return None
 
-def run_with_shell(args):
-    """Run the command with proper shell to avoid rendering issues"""
-    shell_path = find_shell()
-    if not shell_path:
-        print("❌ No suitable shell found. Please install zsh or bash.")
-        return 1
-    
-    # Get current working directory
-    current_dir = os.getcwd()
-    
-    # Reconstruct command but skip the script name (args[0]) and remove --force-shell if present
+def run_with_shell(args, force_shell=False):
+    """Run the command with proper shell to avoid rendering issues
+    
+    main.py needs no shell features, so it is started directly in the
+    current directory; a shell is only put in between with --force-shell.
+    Without exec support, returns the command's exit code.
+    """
+    # Reconstruct command but skip the script name (args[0]) and the
+    # launcher's own options
     cmd_args = ['python', 'main.py']
-    main_args = args[1:]
-    
-    # Remove --force-shell and --force-direct from arguments passed to main.py
-    if '--force-shell' in main_args:
-        main_args.remove('--force-shell')
-    if '--force-direct' in main_args:
-        main_args.remove('--force-direct')
-    
-    cmd_args.extend(main_args)
-    cmd = ' '.join(cmd_args)
+    cmd_args.extend(arg for arg in args[1:] if arg not in _WRAPPER_FLAGS)
     
-    # Construct full shell command
-    shell_cmd = [shell_path, '-c', f"cd '{current_dir}' && {cmd}"]
-    
-    print(f"🔄 Running through {os.path.basename(shell_path)} to avoid terminal rendering issues...")
+    if force_shell:
+        shell_path = find_shell()
+        if not shell_path:
+            print("❌ No suitable shell found. Please install zsh or bash.")
+            return 1
+        
+        # Construct full shell command
+        cmd_args = [shell_path, '-c', ' '.join(shlex.quote(arg) for arg in cmd_args)]
+        print(f"🔄 Running through {os.path.basename(shell_path)} to avoid terminal rendering issues...")
     
     try:
-        # Use subprocess.call to inherit stdin/stdout/stderr
-        return subprocess.call(shell_cmd)
+        return exec_command(cmd_args)
     except Exception as e:
         print(f"❌ Error running command: {e}")
         return 1
 
+def exec_command(cmd_args):
+    """Replace the launcher process with the command
+    
+    The launcher does nothing after main.py exits, so there is no reason to
+    keep it waiting as a parent process. Falls back to running the command
+    as a child (inheriting stdin/stdout/stderr) where exec isn't available.
+    
+    Returns:
+        The command's exit code; only returned on the fallback path
+    """
+    if os.name != 'nt':
+        sys.stdout.flush()
+        sys.stderr.flush()
+        try:
+            os.execvp(cmd_args[0], cmd_args)
+        except OSError:
+            pass
+    return subprocess.call(cmd_args)
+
 def parse_args():
     """Parse command line arguments"""
     parser = argparse.ArgumentParser(
@@ -152,25 +223,15 @@ def main():
         
     if use_shell:
         # Run through shell
-        return run_with_shell(sys.argv)
+        return run_with_shell(sys.argv, force_shell=args.force_shell)
     else:
         # Direct execution
         try:
             # Filter out wrapper-specific arguments
-            main_args = []
-            skip_next = False
-            for i, arg in enumerate(sys.argv[1:]):
-                if skip_next:
-                    skip_next = False
-                    continue
-                
-                if arg in ['--force-shell', '--force-direct']:
-                    continue
-                    
-                main_args.append(arg)
+            main_args = [arg for arg in sys.argv[1:] if arg not in _WRAPPER_FLAGS]
             
             cmd = ['python', 'main.py'] + main_args
-            return subprocess.call(cmd)
+            return exec_command(cmd)
         except Exception as e:
             print(f"❌ Error running command: {e}")
             print("Try running with --force-shell to use bash/zsh instead.")
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+_walker.py - Part of Reflexia Model Manager
+
+Copyright (c) 2025 Matthew D. Scott
+All rights reserved.
+
+This source code is licensed under the Reflexia Model Manager License
+found in the LICENSE file in the root directory of this source tree.
+
+Unauthorized use, reproduction, or distribution is prohibited.
+
+Source tree walking shared by the maintenance scripts.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Runs over at least this many files are spread across processes
+PARALLEL_MIN_FILES = 64
+
+def walk_source_files(root, *, ignore_dirs, extensions=None, recursive=True):
+    """Yield a DirEntry for every file under root with one of extensions
+
+    Uses os.scandir, whose entries already know whether they are
+    directories, so only the files themselves are ever stat'ed.
+    Directories named in ignore_dirs are not entered, and with
+    extensions=None every file is yielded.
+    """
+    if extensions is not None:
+        extensions = tuple(extensions)
+    stack = [os.fspath(root)]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive and entry.name not in ignore_dirs:
+                        stack.append(entry.path)
+                elif entry.is_file() and (extensions is None or entry.name.endswith(extensions)):
+                    yield entry
+
+def map_files(func, file_paths, *iterables):
+    """Apply func(file_path, *items) to every file, in order
+
+    Each of iterables supplies one further argument per file. Runs across
+    a process pool once there are enough files to repay starting it.
+    """
+    if len(file_paths) < PARALLEL_MIN_FILES:
+        return list(map(func, file_paths, *iterables))
+    with ProcessPoolExecutor() as executor:
+        return list(executor.map(func, file_paths, *iterables, chunksize=32))
@@ -6,6 +6,8 @@ import os
 import sys
 from pathlib import Path
 
+from _walker import map_files, walk_source_files
+
 # Define the header for Python files
 PYTHON_HEADER = '''#!/usr/bin/env python3
 """
@@ -57,39 +59,41 @@ IGNORE_DIRS = [
     'temp'
 ]
 
-def should_ignore(path):
-    """Check if path should be ignored"""
-    for ignore_dir in IGNORE_DIRS:
-        if ignore_dir in path.parts:
-            return True
-    return False
+# Bytes read from the start of a file to look for an existing header
+HEADER_PROBE_SIZE = 512
 
 def apply_header_to_file(file_path, header_template):
-    """Apply header to a single file"""
+    """Apply header to a single file, returning a message describing the result"""
     filename = os.path.basename(file_path)
     header = header_template.format(filename=filename)
     
-    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-        content = f.read()
+    # Check if file already has a copyright header with one unbuffered
+    # read; files that have one are never read past their first few
+    # hundred bytes
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        head = os.read(fd, HEADER_PROBE_SIZE)
+    finally:
+        os.close(fd)
+    if b"Copyright (c)" in head:
+        return f"Skipping {file_path} - already has copyright header"
     
-    # Check if file already has a copyright header
-    if "Copyright (c)" in content[:500]:
-        print(f"Skipping {file_path} - already has copyright header")
-        return
+    with open(file_path, 'r', encoding='utf-8', errors='ignore', newline='') as f:
+        content = f.read()
     
     # For Python files, handle shebang line properly
     if file_path.suffix in PYTHON_EXTENSIONS and content.startswith('#!/'):
         lines = content.split('\n')
         shebang = lines[0]
         rest = '\n'.join(lines[1:])
-        new_content = shebang + '\n"""' + header.split('"""')[1] + rest
+        new_content = shebang + '\n"""' + header.split('"""', 1)[1] + rest
     else:
         new_content = header + content
     
     with open(file_path, 'w', encoding='utf-8') as f:
         f.write(new_content)
         
-    print(f"Applied header to {file_path}")
+    return f"Applied header to {file_path}"
 
 def apply_headers(directory):
     """Apply headers to all source files in directory"""
@@ -98,25 +102,19 @@ def apply_headers(directory):
     # Count files processed
     count = 0
     
-    # Traverse all files recursively
-    for root, dirs, files in os.walk(directory):
-        # Skip ignored directories
-        dirs[:] = [d for d in dirs if d not in IGNORE_DIRS]
-        
-        root_path = Path(root)
-        if should_ignore(root_path):
-            continue
-            
-        for file in files:
-            file_path = root_path / file
-            
-            # Apply appropriate header based on file extension
-            if file_path.suffix in PYTHON_EXTENSIONS:
-                apply_header_to_file(file_path, PYTHON_HEADER)
-                count += 1
-            elif file_path.suffix in JS_EXTENSIONS:
-                apply_header_to_file(file_path, JS_HEADER)
-                count += 1
+    # Pick the header for each source file
+    file_paths = []
+    headers = []
+    for entry in walk_source_files(directory, ignore_dirs=IGNORE_DIRS,
+                                   extensions=PYTHON_EXTENSIONS + JS_EXTENSIONS):
+        file_path = Path(entry.path)
+        file_paths.append(file_path)
+        headers.append(PYTHON_HEADER if file_path.suffix in PYTHON_EXTENSIONS else JS_HEADER)
+    
+    # Apply headers in parallel; messages are printed here, in walk order
+    for message in map_files(apply_header_to_file, file_paths, headers):
+        print(message)
+    count = len(file_paths)
     
     print(f"\nApplied headers to {count} files")
 
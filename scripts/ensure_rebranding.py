@@ -9,16 +9,23 @@ This source code is licensed under the Reflexia Model Manager License
 found in the LICENSE file in the root directory of this source tree.
 
 Unauthorized use, reproduction, or distribution is prohibited.
-"""
+
 Script to ensure all DeepSeek references are properly renamed to Reflexia across the codebase.
 This script scans all relevant files and reports any remaining occurrences of DeepSeek.
 """
 import os
 import re
+import bisect
+import mmap
 import sys
 from pathlib import Path
 import argparse
 import fnmatch
+import itertools
+import shutil
+import tempfile
+
+from _walker import map_files, walk_source_files
 
 # ANSI color codes for highlighting
 RED = '\033[0;31m'
@@ -29,15 +36,35 @@ MAGENTA = '\033[0;35m'
 CYAN = '\033[0;36m'
 NC = '\033[0m'  # No Color
 
-# Search patterns - case insensitive
-PATTERNS = [
-    'deepseek', 
-    'deep seek',
-    'DeepSeek',
-    'Deep Seek',
-    'DEEPSEEK',
-    'DEEP SEEK'
-]
+# Search pattern - matches deepseek and deep seek in any casing
+DEEPSEEK_RE = re.compile(r'deep ?seek', re.IGNORECASE)
+
+# Common spellings and their replacements, in the casing _reflexia_like
+# would give them; str.replace handles these without the regex engine
+LITERAL_REPLACEMENTS = (
+    ('DeepSeek', 'Reflexia'),
+    ('Deepseek', 'Reflexia'),
+    ('deepseek', 'reflexia'),
+    ('DEEPSEEK', 'REFLEXIA'),
+    ('Deep Seek', 'Reflexia'),
+    ('deep seek', 'reflexia'),
+    ('DEEP SEEK', 'REFLEXIA'),
+)
+
+# Byte form of the search pattern, for checking files before decoding them
+DEEPSEEK_BYTES_RE = re.compile(rb'deep ?seek', re.IGNORECASE)
+
+# Files at least this large are searched through a memory map
+MMAP_MIN_SIZE = 1024
+
+# Files larger than this are skipped; source files are never this big
+MAX_FILE_SIZE = 4 * 1024 * 1024
+
+# Bytes read from the start of a file to tell whether it is binary
+BINARY_PROBE_SIZE = 512
+
+# Line breaks, used to map match offsets to line numbers
+NEWLINE_RE = re.compile('\n')
 
 # File extensions to check
 FILE_EXTENSIONS = [
@@ -62,10 +89,6 @@ EXCLUDE_FILES = [
 
 def should_check_file(file_path):
     """Determine if a file should be checked based on exclusion rules"""
-    # Check if file extension is in the list to check
-    if not any(file_path.endswith(ext) for ext in FILE_EXTENSIONS):
-        return False
-    
     # Check if file matches any exclude pattern
     rel_path = os.path.relpath(file_path)
     for pattern in EXCLUDE_FILES:
@@ -74,39 +97,70 @@ def should_check_file(file_path):
     
     return True
 
+def iter_candidate_files(directory, recursive=True):
+    """Yield the paths of files to check under directory"""
+    for entry in walk_source_files(directory, ignore_dirs=EXCLUDE_DIRS,
+                                   extensions=FILE_EXTENSIONS, recursive=recursive):
+        if should_check_file(entry.path):
+            yield entry.path
+
+def _mentions_deepseek(file_path):
+    """Check a file's raw bytes for DeepSeek references without decoding it
+    
+    Files over MAX_FILE_SIZE, and binary files (a NUL byte near the start),
+    are never searched.
+    """
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size > MAX_FILE_SIZE:
+            return False
+        
+        head = f.read(BINARY_PROBE_SIZE)
+        if b'\0' in head:
+            return False
+        
+        if size < MMAP_MIN_SIZE:
+            return DEEPSEEK_BYTES_RE.search(head + f.read()) is not None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return DEEPSEEK_BYTES_RE.search(mm) is not None
+
 def find_deepseek_references(file_path):
     """Find DeepSeek references in a file"""
     references = []
     
     try:
+        # Most files have no references; only decode the ones that do
+        if not _mentions_deepseek(file_path):
+            return references
+        
         with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
             content = f.read()
             
-            # Search for each pattern
-            for pattern in PATTERNS:
-                # Case insensitive search
-                matches = re.finditer(pattern, content, re.IGNORECASE)
+            # Offsets of every newline, computed on the first match only
+            newlines = None
+            
+            # Search for all spellings in one pass
+            for match in DEEPSEEK_RE.finditer(content):
+                if newlines is None:
+                    newlines = [m.start() for m in NEWLINE_RE.finditer(content)]
                 
-                for match in matches:
-                    # Get line number and context
-                    line_num = content[:match.start()].count('\n') + 1
-                    
-                    # Get the line containing the match
-                    line_start = content.rfind('\n', 0, match.start()) + 1
-                    line_end = content.find('\n', match.start())
-                    if line_end == -1:  # Handle last line
-                        line_end = len(content)
-                        
-                    line_content = content[line_start:line_end]
-                    
-                    # Highlight the match in the line
-                    match_in_line = match.group()
-                    highlighted_line = line_content.replace(
-                        match_in_line, 
-                        f"{RED}{match_in_line}{NC}"
-                    )
+                # Get line number and context: the line lies between the
+                # newlines on either side of the match
+                line_index = bisect.bisect_right(newlines, match.start())
+                line_num = line_index + 1
+                line_start = newlines[line_index - 1] + 1 if line_index else 0
+                line_end = newlines[line_index] if line_index < len(newlines) else len(content)
                     
-                    references.append((line_num, match.group(), highlighted_line))
+                line_content = content[line_start:line_end]
+                
+                # Highlight the match in the line
+                match_in_line = match.group()
+                highlighted_line = line_content.replace(
+                    match_in_line, 
+                    f"{RED}{match_in_line}{NC}"
+                )
+                
+                references.append((line_num, match.group(), highlighted_line))
     
     except Exception as e:
         print(f"Error reading {file_path}: {e}")
@@ -116,40 +170,26 @@ def find_deepseek_references(file_path):
 def scan_directory(directory, recursive=True):
     """Scan directory for DeepSeek references"""
     directory_path = Path(directory)
-    total_files = 0
     files_with_references = 0
     total_references = 0
     
     print(f"{BLUE}Scanning directory: {directory_path.absolute()}{NC}")
     
-    # Walk through the directory
-    for root, dirs, files in os.walk(directory_path):
-        # Skip excluded directories
-        dirs[:] = [d for d in dirs if d not in EXCLUDE_DIRS]
-        
-        for file in files:
-            file_path = os.path.join(root, file)
+    # Search files in parallel; results come back in walk order
+    file_paths = list(iter_candidate_files(directory_path, recursive))
+    total_files = len(file_paths)
+    
+    for file_path, references in zip(file_paths, map_files(find_deepseek_references, file_paths)):
+        if references:
+            files_with_references += 1
+            total_references += len(references)
             
-            if should_check_file(file_path):
-                total_files += 1
-                
-                # Find references
-                references = find_deepseek_references(file_path)
-                
-                if references:
-                    files_with_references += 1
-                    total_references += len(references)
-                    
-                    # Print file path with references
-                    print(f"\n{YELLOW}Found {len(references)} references in {file_path}:{NC}")
-                    
-                    # Print each reference
-                    for line_num, match, highlighted_line in references:
-                        print(f"  Line {line_num}: {highlighted_line}")
-        
-        # Stop recursion if not recursive
-        if not recursive:
-            break
+            # Print file path with references
+            print(f"\n{YELLOW}Found {len(references)} references in {file_path}:{NC}")
+            
+            # Print each reference
+            for line_num, match, highlighted_line in references:
+                print(f"  Line {line_num}: {highlighted_line}")
     
     # Print summary
     print(f"\n{BLUE}Scan Complete{NC}")
@@ -164,46 +204,66 @@ def scan_directory(directory, recursive=True):
     
     return total_references
 
+def _reflexia_like(match):
+    """Return the Reflexia name in the casing of a DeepSeek match"""
+    text = match.group()
+    if text.isupper():
+        return 'REFLEXIA'
+    if text[0].isupper():
+        return 'Reflexia'
+    return 'reflexia'
+
 def fix_deepseek_references(file_path, dry_run=True):
     """Fix DeepSeek references in a file"""
+    fixed, message = _fix_file(file_path, dry_run)
+    if message:
+        print(message)
+    return fixed
+
+def _write_atomically(file_path, content):
+    """Replace a file's content so readers never see a partial write
+    
+    The new content goes to a temporary file in the same directory, which
+    takes the original's permissions and is then renamed over it.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=directory, delete=False) as f:
+        f.write(content)
     try:
+        shutil.copymode(file_path, f.name)
+        os.replace(f.name, file_path)
+    except BaseException:
+        os.unlink(f.name)
+        raise
+
+def _fix_file(file_path, dry_run):
+    """Fix DeepSeek references in a file, returning (fixed, message)"""
+    try:
+        if not _mentions_deepseek(file_path):
+            return False, None
+        
         with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
             content = f.read()
             
-        # Create a copy of the original content
+        # Replace the common spellings with str.replace, then any other
+        # casing with one regex pass, keeping the match's casing
         new_content = content
-        
-        # Replacement mapping
-        replacements = {
-            'deepseek': 'reflexia',
-            'Deepseek': 'Reflexia',
-            'DeepSeek': 'Reflexia',
-            'DEEPSEEK': 'REFLEXIA',
-            'deep seek': 'reflexia',
-            'Deep Seek': 'Reflexia',
-            'DEEP SEEK': 'REFLEXIA'
-        }
-        
-        # Apply replacements
-        for old, new in replacements.items():
-            new_content = re.sub(re.escape(old), new, new_content, flags=re.IGNORECASE)
+        for old, new in LITERAL_REPLACEMENTS:
+            new_content = new_content.replace(old, new)
+        new_content = DEEPSEEK_RE.sub(_reflexia_like, new_content)
         
         # Check if content was modified
         if new_content != content:
             if dry_run:
-                print(f"{YELLOW}Would fix references in: {file_path}{NC}")
-                return True
+                return True, f"{YELLOW}Would fix references in: {file_path}{NC}"
             else:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(new_content)
-                print(f"{GREEN}Fixed references in: {file_path}{NC}")
-                return True
+                _write_atomically(file_path, new_content)
+                return True, f"{GREEN}Fixed references in: {file_path}{NC}"
         
-        return False
+        return False, None
     
     except Exception as e:
-        print(f"{RED}Error fixing {file_path}: {e}{NC}")
-        return False
+        return False, f"{RED}Error fixing {file_path}: {e}{NC}"
 
 def fix_all_references(directory, recursive=True, dry_run=True):
     """Fix all DeepSeek references in directory"""
@@ -212,22 +272,13 @@ def fix_all_references(directory, recursive=True, dry_run=True):
     
     print(f"{BLUE}{'Analyzing' if dry_run else 'Fixing'} references in: {directory_path.absolute()}{NC}")
     
-    # Walk through the directory
-    for root, dirs, files in os.walk(directory_path):
-        # Skip excluded directories
-        dirs[:] = [d for d in dirs if d not in EXCLUDE_DIRS]
-        
-        for file in files:
-            file_path = os.path.join(root, file)
-            
-            if should_check_file(file_path):
-                # Fix references
-                if fix_deepseek_references(file_path, dry_run):
-                    total_files_fixed += 1
-        
-        # Stop recursion if not recursive
-        if not recursive:
-            break
+    # Fix files in parallel; messages are printed here, in walk order
+    file_paths = list(iter_candidate_files(directory_path, recursive))
+    for fixed, message in map_files(_fix_file, file_paths, itertools.repeat(dry_run)):
+        if message:
+            print(message)
+        if fixed:
+            total_files_fixed += 1
     
     # Print summary
     print(f"\n{BLUE}Operation Complete{NC}")
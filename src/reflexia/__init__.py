@@ -15,9 +15,27 @@ Unauthorized use, reproduction, or distribution is prohibited.
 Reflexia Model Manager core package
 """
 
-from ..config import Config
-from ..model_manager import ModelManager
-from ..memory_manager import MemoryManager
-from ..prompt_manager import PromptManager
+import importlib
 
-__all__ = ["Config", "ModelManager", "MemoryManager", "PromptManager"]
\ No newline at end of file
+# Public classes and the modules they live in. They are imported on first
+# access (PEP 562) so that importing a subpackage such as
+# reflexia.licensing does not pull in the model and memory managers.
+_LAZY_IMPORTS = {
+    "Config": "..config",
+    "ModelManager": "..model_manager",
+    "MemoryManager": "..memory_manager",
+    "PromptManager": "..prompt_manager",
+}
+
+__all__ = ["Config", "ModelManager", "MemoryManager", "PromptManager"]
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_IMPORTS))
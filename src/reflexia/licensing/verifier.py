@@ -12,10 +12,42 @@ For licensing inquiries: matthewdscott7@gmail.com
 
 import time
 import os
-import json
+import copy
 import hashlib
 import uuid
+import functools
+import platform
 from datetime import datetime, timedelta
+from typing import ClassVar, Dict, Tuple
+
+from json_utils import json_dumps, json_loads
+
+@functools.lru_cache(maxsize=1)
+def _platform_info():
+    """Return the platform details, which may spawn uname, once per process"""
+    return {
+        "hostname": platform.node(),
+        "system": platform.system(),
+        "release": platform.release(),
+        "version": platform.version(),
+        "machine": platform.machine(),
+        "processor": platform.processor()
+    }
+
+@functools.lru_cache(maxsize=1)
+def _read_instance_id():
+    """Read or create the installation's instance ID, once per process"""
+    instance_id_path = os.path.expanduser("~/.reflexia/instance_id")
+    os.makedirs(os.path.dirname(instance_id_path), exist_ok=True)
+    
+    if os.path.exists(instance_id_path):
+        with open(instance_id_path, 'r') as f:
+            return f.read().strip()
+    else:
+        instance_id = str(uuid.uuid4())
+        with open(instance_id_path, 'w') as f:
+            f.write(instance_id)
+        return instance_id
 
 class LicenseVerifier:
     """
@@ -60,6 +92,11 @@ class LicenseVerifier:
         }
     }
     
+    # License data parsed from each license file, with the file's
+    # (mtime, size) when it was read. Verifiers reuse it while the file is
+    # unchanged, so constructing one costs a stat rather than a parse.
+    _shared_licenses: ClassVar[Dict[str, Tuple[Tuple[int, int], dict]]] = {}
+    
     def __init__(self):
         """Initialize the license verifier"""
         self.license_data = None
@@ -69,38 +106,51 @@ class LicenseVerifier:
     
     def _get_instance_id(self):
         """Get or create a unique instance ID for this installation"""
-        instance_id_path = os.path.expanduser("~/.reflexia/instance_id")
-        os.makedirs(os.path.dirname(instance_id_path), exist_ok=True)
-        
-        if os.path.exists(instance_id_path):
-            with open(instance_id_path, 'r') as f:
-                return f.read().strip()
-        else:
-            instance_id = str(uuid.uuid4())
-            with open(instance_id_path, 'w') as f:
-                f.write(instance_id)
-            return instance_id
+        return _read_instance_id()
+    
+    @staticmethod
+    def _file_signature(path):
+        """Return a file's (mtime, size), to tell when it has changed"""
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
     
     def load_license(self):
         """Load license data from file"""
-        if os.path.exists(self.license_path):
+        shared = LicenseVerifier._shared_licenses
+        try:
+            signature = self._file_signature(self.license_path)
+        except OSError:
+            shared.pop(self.license_path, None)
+            self.license_data = None
+            return False
+        
+        cached = shared.get(self.license_path)
+        if cached is None or cached[0] != signature:
             try:
-                with open(self.license_path, 'r') as f:
-                    self.license_data = json.load(f)
-                return True
+                with open(self.license_path, 'rb') as f:
+                    license_data = json_loads(f.read())
             except Exception:
+                shared.pop(self.license_path, None)
                 self.license_data = None
                 return False
-        return False
+            cached = shared[self.license_path] = (signature, license_data)
+        
+        # Each verifier gets its own copy, so changing one leaves the
+        # others and the cache alone
+        self.license_data = copy.deepcopy(cached[1])
+        return True
     
     def save_license(self, license_key, license_data):
         """Save license data to file"""
         os.makedirs(os.path.dirname(self.license_path), exist_ok=True)
         
-        with open(self.license_path, 'w') as f:
-            json.dump(license_data, f)
+        with open(self.license_path, 'w', encoding='utf-8') as f:
+            f.write(json_dumps(license_data))
         
         self.license_data = license_data
+        LicenseVerifier._shared_licenses[self.license_path] = (
+            self._file_signature(self.license_path), copy.deepcopy(license_data)
+        )
         return True
     
     def activate_license(self, license_key, email):
@@ -194,22 +244,19 @@ class LicenseVerifier:
         Returns:
             dict: License request information
         """
-        import platform
-        
         system_info = {
             "instance_id": self.instance_id,
-            "hostname": platform.node(),
-            "system": platform.system(),
-            "release": platform.release(),
-            "version": platform.version(),
-            "machine": platform.machine(),
-            "processor": platform.processor(),
+            **_platform_info(),
             "timestamp": datetime.now().isoformat()
         }
         
-        # Create a signature based on system information
-        signature_str = f"{system_info['instance_id']}:{system_info['hostname']}:{system_info['system']}:{system_info['machine']}"
-        signature = hashlib.sha256(signature_str.encode()).hexdigest()
+        # Create a signature based on system information, hashing the
+        # colon-separated fields without building the joined string
+        digest = hashlib.sha256(system_info['instance_id'].encode())
+        for field in ('hostname', 'system', 'machine'):
+            digest.update(b':')
+            digest.update(system_info[field].encode())
+        signature = digest.hexdigest()
         
         return {
             "request_id": signature[:16],
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+test_json_utils.py - Part of Reflexia Model Manager
+
+Copyright (c) 2025 Matthew D. Scott
+All rights reserved.
+
+This source code is licensed under the Reflexia Model Manager License
+found in the LICENSE file in the root directory of this source tree.
+
+Unauthorized use, reproduction, or distribution is prohibited.
+
+Tests for the shared JSON helpers
+"""
+import os
+import sys
+import json
+from unittest.mock import patch
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json_utils
+
+class TestJsonUtils:
+    """Test cases for the JSON helpers"""
+    
+    def test_convert_dataset_non_ascii(self, tmp_path):
+        """Test unescaped non-ASCII examples are written as UTF-8 in any locale"""
+        dataset = tmp_path / "data.jsonl"
+        dataset.write_text('{"prompt": "Qu\'est-ce qu\'un café?", "response": "Une boisson ☕"}\n',
+                           encoding='utf-8')
+        output_file = tmp_path / "out.jsonl"
+        
+        # Text files default to ASCII, as under a C locale
+        def ascii_open(file, mode='r', **kwargs):
+            if 'b' not in mode:
+                kwargs.setdefault('encoding', 'ascii')
+            return open(file, mode, **kwargs)
+        
+        # json_dumps as orjson behaves, leaving non-ASCII text unescaped
+        with patch("json_utils.json_dumps", lambda obj: json.dumps(obj, ensure_ascii=False)), \
+             patch("json_utils.open", ascii_open, create=True):
+            json_utils.convert_dataset(dataset, output_file)
+        
+        assert json.loads(output_file.read_text(encoding='utf-8')) == {
+            "prompt": "Qu'est-ce qu'un café?", "response": "Une boisson ☕"
+        }
+    
+    def test_convert_dataset_array(self, tmp_path):
+        """Test JSON array datasets keep only records with a prompt and response"""
+        dataset = tmp_path / "data.json"
+        dataset.write_text('[{"instruction": "Hi", "output": "Hello"}, {"prompt": "x"}]')
+        output_file = tmp_path / "out.jsonl"
+        
+        json_utils.convert_dataset(dataset, output_file)
+        
+        assert output_file.read_text().splitlines() == [json_utils.json_dumps({"prompt": "Hi", "response": "Hello"})]
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+test_license_verifier.py - Part of Reflexia Model Manager
+
+Copyright (c) 2025 Matthew D. Scott
+All rights reserved.
+
+This source code is licensed under the Reflexia Model Manager License
+found in the LICENSE file in the root directory of this source tree.
+
+Unauthorized use, reproduction, or distribution is prohibited.
+
+Tests for the license verifier
+"""
+import os
+import sys
+import pytest
+from unittest.mock import patch
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.reflexia.licensing.verifier import LicenseVerifier
+
+class TestLicenseVerifier:
+    """Test cases for the LicenseVerifier class"""
+    
+    @pytest.fixture(autouse=True)
+    def home(self, tmp_path, monkeypatch):
+        """Give each test its own home directory and an empty license cache"""
+        monkeypatch.setenv("HOME", str(tmp_path))
+        with patch.dict(LicenseVerifier._shared_licenses, clear=True), \
+             patch("src.reflexia.licensing.verifier._read_instance_id", return_value="instance"):
+            yield tmp_path
+    
+    def test_license_shared_until_changed(self, home):
+        """Test verifiers share one parse but notice a changed or deleted file"""
+        LicenseVerifier().save_license("key", {"type": "personal"})
+        
+        with patch("src.reflexia.licensing.verifier.json_loads") as json_loads:
+            first = LicenseVerifier()
+            second = LicenseVerifier()
+        json_loads.assert_not_called()
+        assert first.license_data == {"type": "personal"}
+        
+        # Each verifier has its own copy
+        first.license_data["type"] = "enterprise"
+        assert second.license_data == {"type": "personal"}
+        assert LicenseVerifier().license_data == {"type": "personal"}
+        
+        license_path = home / ".reflexia" / "license.json"
+        license_path.write_text('{"type": "professional!"}')
+        assert LicenseVerifier().license_data == {"type": "professional!"}
+        
+        license_path.unlink()
+        assert LicenseVerifier().license_data is None
+        assert not LicenseVerifier._shared_licenses
+    
+    def test_invalid_license_clears_cache(self, home):
+        """Test a license file that fails to parse is not served from the cache"""
+        LicenseVerifier().save_license("key", {"type": "personal"})
+        (home / ".reflexia" / "license.json").write_text("{not json")
+        
+        verifier = LicenseVerifier()
+        assert verifier.license_data is None
+        assert not verifier.load_license()
+        assert not LicenseVerifier._shared_licenses
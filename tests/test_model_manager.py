@@ -14,6 +14,7 @@ Tests for the ModelManager module
 """
 import os
 import sys
+import json
 import pytest
 from unittest.mock import patch, MagicMock
 
@@ -23,6 +24,13 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from config import Config
 from model_manager import ModelManager
 
+def mock_tags_response(mock_urlopen, *model_names):
+    """Make a patched urlopen return an Ollama /api/tags payload"""
+    payload = json.dumps({"models": [{"name": name} for name in model_names]})
+    mock_response = MagicMock()
+    mock_response.read.return_value = payload.encode()
+    mock_urlopen.return_value.__enter__.return_value = mock_response
+
 class TestModelManager:
     """Test cases for the ModelManager class"""
     
@@ -35,13 +43,11 @@ class TestModelManager:
         config.set("model", "context_length", 4096)
         return config
     
-    @patch('subprocess.run')
-    def test_init(self, mock_run, config):
+    @patch('model_manager.urlopen')
+    def test_init(self, mock_urlopen, config):
         """Test ModelManager initialization"""
-        # Mock subprocess.run for _check_model_availability
-        mock_process = MagicMock()
-        mock_process.stdout = "llama3:latest\n"
-        mock_run.return_value = mock_process
+        # Mock the Ollama API for _check_model_availability
+        mock_tags_response(mock_urlopen, "llama3:latest")
         
         # Create model manager
         model_manager = ModelManager(config)
@@ -51,16 +57,14 @@ class TestModelManager:
         assert model_manager.quantization == "q4_0"
         assert model_manager.context_length == 4096
         
-        # Verify subprocess was called
-        mock_run.assert_called_once()
+        # Verify the Ollama API was queried
+        mock_urlopen.assert_called_once()
     
-    @patch('subprocess.run')
-    def test_estimate_content_complexity(self, mock_run, config):
+    @patch('model_manager.urlopen')
+    def test_estimate_content_complexity(self, mock_urlopen, config):
         """Test content complexity estimation"""
-        # Mock subprocess.run for _check_model_availability
-        mock_process = MagicMock()
-        mock_process.stdout = "llama3:latest\n"
-        mock_run.return_value = mock_process
+        # Mock the Ollama API for _check_model_availability
+        mock_tags_response(mock_urlopen, "llama3:latest")
         
         # Create model manager
         model_manager = ModelManager(config)
@@ -83,4 +87,158 @@ class TestModelManager:
         assert 0 <= complex_complexity <= 1
         
         # Complex text should be more complex than simple text
-        assert complex_complexity > simple_complexity
\ No newline at end of file
+        assert complex_complexity > simple_complexity
+    
+    @patch('model_manager.urlopen')
+    def test_cached_response(self, mock_urlopen, config):
+        """Test that repeat prompts are served from the response cache"""
+        mock_tags_response(mock_urlopen, "llama3:latest")
+        
+        model_manager = ModelManager(config)
+        
+        with patch.object(model_manager, 'generate_response', return_value="Hi") as mock_generate:
+            assert model_manager.cached_response("Hello") == "Hi"
+            assert model_manager.cached_response("Hello", system_prompt=None) == "Hi"
+            mock_generate.assert_called_once()
+            
+            # Resizing the cache keeps caching enabled
+            model_manager.set_cache_size(8)
+            model_manager.cached_response("Hello")
+            model_manager.cached_response("Hello")
+            assert mock_generate.call_count == 2
+    
+    @patch('model_manager.urlopen')
+    def test_ollama_host(self, mock_urlopen, config):
+        """Test OLLAMA_HOST without a port uses Ollama's default port"""
+        mock_tags_response(mock_urlopen, "llama3:latest")
+        
+        for host, url in [("myhost", "http://myhost:11434"),
+                          ("0.0.0.0:8080", "http://0.0.0.0:8080"),
+                          ("https://ollama.example.com/", "https://ollama.example.com")]:
+            with patch.dict(os.environ, {"OLLAMA_HOST": host}):
+                assert ModelManager(config).ollama_url == url
+    
+    @patch('model_manager.urlopen')
+    def test_untagged_model_available(self, mock_urlopen, config, capsys):
+        """Test an untagged model name matches its :latest tag"""
+        mock_tags_response(mock_urlopen, "llama3:latest")
+        config.set("model", "name", "llama3")
+        
+        with patch.dict(os.environ):
+            os.environ.pop("DEFAULT_MODEL", None)
+            ModelManager(config)
+        
+        assert "not found" not in capsys.readouterr().out
+    
+    @patch('model_manager.urlopen')
+    def test_model_list_is_cached(self, mock_urlopen, config):
+        """Test that the Ollama model list is reused across quantization changes"""
+        mock_tags_response(mock_urlopen, "llama3:latest", "llama3:q8_0")
+        
+        model_manager = ModelManager(config)
+        
+        assert model_manager.set_quantization("q8_0")
+        assert model_manager.model_name == "llama3:q8_0"
+        mock_urlopen.assert_called_once()
+    
+    @patch('model_manager.urlopen')
+    def test_adaptive_quantization(self, mock_urlopen, config):
+        """Test quantization steps down under memory pressure"""
+        mock_tags_response(mock_urlopen, "llama3:latest")
+        config.set("model", "quantization", "q8_0")
+        
+        model_manager = ModelManager(config)
+        model_manager._adapt_check_interval = 0
+        memory_manager = MagicMock()
+        
+        with patch.object(model_manager, 'set_quantization', return_value=True) as mock_set:
+            # Low pressure leaves quantization alone
+            memory_manager.get_memory_stats.return_value = {"percent": 65}
+            assert not model_manager.adaptive_quantization(memory_manager)
+            mock_set.assert_not_called()
+            
+            # Medium pressure steps down one level, sampling memory once
+            memory_manager.get_memory_stats.reset_mock()
+            memory_manager.get_memory_stats.return_value = {"percent": 80}
+            assert model_manager.adaptive_quantization(memory_manager, content_complexity=0.9)
+            mock_set.assert_called_once_with("q5_k_m")
+            memory_manager.get_memory_stats.assert_called_once()
+            
+            # Recovery forces a reduction even without memory pressure
+            mock_set.reset_mock()
+            memory_manager.get_memory_stats.return_value = {"percent": 65}
+            assert model_manager.adaptive_quantization(memory_manager, force_reduction=True)
+            mock_set.assert_called_once_with("q5_k_m")
+    
+    @patch('model_manager.urlopen')
+    def test_estimate_content_complexities(self, mock_urlopen, config):
+        """Test batch complexity estimation matches the per-text estimate"""
+        mock_tags_response(mock_urlopen, "llama3:latest")
+        
+        model_manager = ModelManager(config)
+        
+        texts = ["Hello, how are you?", "Solve the matrix equation (A * x) = b", ""]
+        scores = model_manager.estimate_content_complexities(texts)
+        
+        assert len(scores) == len(texts)
+        for text, score in zip(texts, scores):
+            assert score == pytest.approx(model_manager.estimate_content_complexity(text))
+        assert len(model_manager.estimate_content_complexities([])) == 0
+    
+    @patch('model_manager.urlopen')
+    def test_adaptive_quantization_dwell(self, mock_urlopen, config):
+        """Test quantization is held for the dwell time after a change"""
+        mock_tags_response(mock_urlopen, "llama3:latest", "llama3:q5_k_m", "llama3:q4_k_m", "llama3:q4_0")
+        config.set("model", "quantization", "q8_0")
+        
+        model_manager = ModelManager(config)
+        model_manager._adapt_check_interval = 0
+        memory_manager = MagicMock()
+        memory_manager.get_memory_stats.return_value = {"percent": 80}
+        
+        assert model_manager.adaptive_quantization(memory_manager)
+        assert model_manager.quantization == "q5_k_m"
+        
+        # Still under pressure, but within the dwell window
+        assert not model_manager.adaptive_quantization(memory_manager)
+        assert model_manager.quantization == "q5_k_m"
+        
+        # Critical pressure bypasses the dwell window
+        memory_manager.get_memory_stats.return_value = {"percent": 95}
+        assert model_manager.adaptive_quantization(memory_manager)
+        assert model_manager.quantization == "q4_0"
+    
+    @patch('model_manager.urlopen')
+    def test_adaptive_quantization_rate_limit(self, mock_urlopen, config):
+        """Test back-to-back adaptive checks only sample memory once"""
+        mock_tags_response(mock_urlopen, "llama3:latest")
+        
+        model_manager = ModelManager(config)
+        memory_manager = MagicMock()
+        memory_manager.get_memory_stats.return_value = {"percent": 65}
+        
+        model_manager.adaptive_quantization(memory_manager)
+        model_manager.adaptive_quantization(memory_manager)
+        memory_manager.get_memory_stats.assert_called_once()
+    
+    @patch('model_manager.urlopen')
+    def test_generate_stream(self, mock_urlopen, config):
+        """Test streamed chunks are yielded and joined by generate_response"""
+        mock_tags_response(mock_urlopen, "llama3:latest")
+        model_manager = ModelManager(config)
+        
+        lines = [
+            b'{"response": "Hel", "done": false}\n',
+            b'{"response": "lo", "done": false}\n',
+            b'{"response": "", "done": true, "eval_count": 2}\n',
+        ]
+        mock_urlopen.return_value.__enter__.return_value = iter(lines)
+        assert list(model_manager.generate_stream("Hi")) == ["Hel", "lo"]
+        
+        mock_urlopen.return_value.__enter__.return_value = iter(lines)
+        assert model_manager.generate_response("Hi", system_prompt="Be brief") == "Hello"
+        
+        request = mock_urlopen.call_args[0][0]
+        payload = json.loads(request.data)
+        assert payload["stream"] is True
+        assert payload["system"] == "Be brief"
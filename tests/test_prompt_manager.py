@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+test_prompt_manager.py - Part of Reflexia Model Manager
+
+Copyright (c) 2025 Matthew D. Scott
+All rights reserved.
+
+This source code is licensed under the Reflexia Model Manager License
+found in the LICENSE file in the root directory of this source tree.
+
+Unauthorized use, reproduction, or distribution is prohibited.
+
+Tests for the PromptManager module
+"""
+import os
+import sys
+import subprocess
+import time
+import pytest
+from unittest.mock import patch
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+from prompt_manager import PromptManager, _compile_template
+
+class TestPromptManager:
+    """Test cases for the PromptManager class"""
+    
+    @pytest.fixture
+    def config(self, tmp_path, monkeypatch):
+        """Create a test configuration rooted in a temporary directory"""
+        monkeypatch.chdir(tmp_path)
+        return Config()
+    
+    def test_builtin_roles(self, config):
+        """Test built-in roles are shared but role sets are per instance"""
+        first = PromptManager(config)
+        second = PromptManager(config)
+        
+        assert "software_engineer" in first.expert_roles
+        assert first.expert_roles["software_engineer"]["domain"] == "Technology"
+        assert first.expert_roles["software_engineer"] is second.expert_roles["software_engineer"]
+        
+        del first.expert_roles["software_engineer"]
+        assert "software_engineer" in second.expert_roles
+        
+        # Equal capability lists share one tuple
+        first.add_expert_role("a", "A", "You are A.", capabilities=["Testing", "Review"])
+        first.add_expert_role("b", "B", "You are B.", capabilities=["Testing", "Review"])
+        assert first.expert_roles["a"]["capabilities"] == ("Testing", "Review")
+        assert first.expert_roles["a"]["capabilities"] is first.expert_roles["b"]["capabilities"]
+    
+    def test_format_prompt(self, config):
+        """Test formatting a prompt with a template and expert role"""
+        prompt_manager = PromptManager(config)
+        
+        formatted = prompt_manager.format_prompt("Hi", role="software_engineer")
+        system = prompt_manager.expert_roles["software_engineer"]["system_prompt"]
+        
+        assert formatted == f"{system}\n\nUser: Hi\nAssistant:"
+        assert prompt_manager.current_role == "software_engineer"
+    
+    def test_custom_roles(self, config):
+        """Test custom roles persist and only custom roles can be removed"""
+        prompt_manager = PromptManager(config)
+        prompt_manager.add_expert_role("tester", "Tester", "You test things.", domain="Technology")
+        prompt_manager.add_expert_role("reviewer", "Reviewer", "You review things.")
+        assert prompt_manager.flush()
+        
+        reloaded = PromptManager(config)
+        assert reloaded.expert_roles["tester"]["system_prompt"] == "You test things."
+        assert "reviewer" in reloaded.expert_roles
+        assert reloaded.expert_roles["reviewer"]["icon"] == "🧠"
+        assert reloaded.expert_roles["tester"]["domain"] is reloaded.expert_roles["software_engineer"]["domain"]
+        
+        assert not reloaded.remove_expert_role("software_engineer")
+        assert not reloaded.remove_expert_role("missing")
+        assert reloaded.remove_expert_role("tester")
+        assert reloaded.flush()
+        assert "tester" not in PromptManager(config).expert_roles
+    
+    def test_batched_saves(self, config, tmp_path):
+        """Test a burst of changes is written once, after the save delay"""
+        prompt_manager = PromptManager(config)
+        prompt_manager._save_delay = 0.05
+        
+        with patch.object(prompt_manager, "_save_expert_roles", wraps=prompt_manager._save_expert_roles) as save:
+            for i in range(10):
+                prompt_manager.add_expert_role(f"role_{i}", f"Role {i}", "You help.")
+            assert save.call_count == 0
+            
+            time.sleep(0.3)
+            assert save.call_count == 1
+        
+        assert "role_9" in PromptManager(config).expert_roles
+        assert not prompt_manager._roles_dirty
+        
+        # Templates are only written when they changed
+        prompt_manager._save_delay = 0
+        prompt_manager.remove_expert_role("role_0")
+        assert not (tmp_path / "output" / "templates" / "templates.json").exists()
+    
+    def test_format_prompt_templates(self, config):
+        """Test compiled templates render exactly like str.format"""
+        prompt_manager = PromptManager(config)
+        prompt_manager.add_template("braces", "{{literal}} {system} | {user_input}!")
+        prompt_manager.add_template("spec", "{system:>3}|{user_input!r}")
+        prompt_manager.set_system_prompt("S")
+        
+        assert prompt_manager.format_prompt("U", template_name="braces") == "{literal} S | U!"
+        assert prompt_manager.format_prompt("U", template_name="spec") == "  S|'U'"
+        assert prompt_manager.format_prompt("U", template_name="missing") == "S\n\nUser: U\nAssistant:"
+        
+        # Saved templates are compiled on load; removed ones fall back to default
+        assert prompt_manager.flush()
+        reloaded = PromptManager(config)
+        reloaded.set_system_prompt("S")
+        assert reloaded.format_prompt("U", template_name="braces") == "{literal} S | U!"
+        reloaded.remove_template("braces")
+        assert reloaded.format_prompt("U", template_name="braces") == "S\n\nUser: U\nAssistant:"
+        
+        # Built-in templates take the specialized path, not the str.format fallback
+        for name in ("default", "code", "creative"):
+            template = prompt_manager.templates[name]
+            assert _compile_template(template) != template.format
+    
+    def test_no_numba_dependency(self):
+        """Test importing the module does not pull in a JIT compiler"""
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+        code = "import sys, prompt_manager; print('numba' in sys.modules)"
+        result = subprocess.run([sys.executable, "-c", code], cwd=root,
+                                capture_output=True, text=True, check=True)
+        assert result.stdout.strip() == "False"
+    
+    def test_recent_roles(self, config):
+        """Test role history keeps the most recent roles first"""
+        prompt_manager = PromptManager(config)
+        role_ids = list(prompt_manager.expert_roles)[:prompt_manager.max_history + 1]
+        
+        for role_id in role_ids:
+            prompt_manager.get_system_prompt(role_id)
+        prompt_manager.get_system_prompt(role_ids[2])
+        prompt_manager.get_system_prompt(role_ids[2])
+        
+        recent = [role["id"] for role in prompt_manager.get_recent_roles()]
+        expected = [role_ids[2]] + [r for r in reversed(role_ids) if r != role_ids[2]]
+        assert recent == expected[:prompt_manager.max_history]
+        assert len(prompt_manager.get_recent_roles(2)) == 2
+        assert prompt_manager.get_recent_roles(1)[0] is prompt_manager.get_current_role_info()
+        
+        # Replaced and removed roles are reflected in the history
+        prompt_manager.add_expert_role("tester", "Tester", "You test things.")
+        prompt_manager.get_system_prompt("tester")
+        prompt_manager.add_expert_role("tester", "QA Tester", "You test things.")
+        assert prompt_manager.get_recent_roles(1)[0]["name"] == "QA Tester"
+        prompt_manager.remove_expert_role("tester")
+        assert prompt_manager.get_recent_roles(1)[0]["id"] == role_ids[2]
+    
+    def test_expert_domains(self, config):
+        """Test filtering roles by domain"""
+        prompt_manager = PromptManager(config)
+        prompt_manager.add_expert_role("tester", "Tester", "You test things.", domain="Quality")
+        
+        assert prompt_manager.get_expert_domains() == sorted(
+            {role["domain"] for role in prompt_manager.expert_roles.values()})
+        assert list(prompt_manager.get_expert_roles(domain="Quality")) == ["tester"]
+        assert all(role["domain"] == "Science"
+                   for role in prompt_manager.get_expert_roles(domain="Science").values())
+        assert prompt_manager.get_expert_roles(domain="Unknown") == {}
+    
+    def test_roles_are_read_only(self, config):
+        """Test roles returned by the get_* methods can't change the manager's roles"""
+        prompt_manager = PromptManager(config)
+        prompt_manager.get_system_prompt("software_engineer")
+        
+        roles = [prompt_manager.get_expert_roles()["software_engineer"],
+                 prompt_manager.get_current_role_info(),
+                 prompt_manager.get_recent_roles()[0]]
+        for role in roles:
+            with pytest.raises(TypeError):
+                role["system_prompt"] = "Changed"
+        with pytest.raises(TypeError):
+            prompt_manager.get_expert_roles()["intruder"] = {}
+        
+        assert "intruder" not in prompt_manager.expert_roles
+        assert prompt_manager.get_system_prompt("software_engineer") != "Changed"
+        assert dict(roles[1])["id"] == "software_engineer"
+    
+    def test_versions(self, config):
+        """Test role and template version tags track their content"""
+        prompt_manager = PromptManager(config)
+        version = prompt_manager.roles_version
+        role_version = prompt_manager.get_role_version("software_engineer")
+        
+        assert version == PromptManager(config).roles_version
+        assert prompt_manager.get_role_version("missing") is None
+        assert prompt_manager.get_template_version("missing") is None
+        
+        prompt_manager.add_template("custom", "{system} {user_input}")
+        custom_version = prompt_manager.get_template_version("custom")
+        prompt_manager.add_template("custom", "{system}: {user_input}")
+        assert prompt_manager.get_template_version("custom") != custom_version
+        
+        prompt_manager.add_expert_role("tester", "Tester", "You test things.")
+        assert prompt_manager.roles_version != version
+        assert prompt_manager.get_role_version("software_engineer") == role_version
+        
+        prompt_manager.remove_expert_role("tester")
+        assert prompt_manager.roles_version == version
+    
+    def test_search_roles(self, config):
+        """Test searching roles by name, domain and capability"""
+        prompt_manager = PromptManager(config)
+        prompt_manager.add_expert_role("tester", "Bug Hunter", "You test things.",
+                                       domain="QA", capabilities=["Fuzzing"])
+        
+        for query in ("bug hunter", "qa", "FUZZ"):
+            assert [role["id"] for role in prompt_manager.search_roles(query)] == ["tester"]
+        
+        # Matches never span two fields
+        assert prompt_manager.search_roles("hunterqa") == []
+        assert prompt_manager.search_roles("") == []
+        assert prompt_manager.search_roles("a") == []
+        
+        prompt_manager.remove_expert_role("tester")
+        assert prompt_manager.search_roles("fuzzing") == []
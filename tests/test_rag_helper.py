@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+test_rag_helper.py - Part of Reflexia Model Manager
+
+Copyright (c) 2025 Matthew D. Scott
+All rights reserved.
+
+This source code is licensed under the Reflexia Model Manager License
+found in the LICENSE file in the root directory of this source tree.
+
+Unauthorized use, reproduction, or distribution is prohibited.
+
+Tests for the RAG helper CLI
+"""
+import os
+import sys
+import pytest
+from unittest.mock import patch, call, MagicMock
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import rag_helper
+
+def mock_chroma_client(collections):
+    """Build a fake chromadb module whose client serves the given collections"""
+    handles = {}
+    for name, sources in collections.items():
+        handles[name] = MagicMock()
+        metadatas = [{"source": source} for source in sources or []]
+        handles[name].get.side_effect = lambda include, limit, offset, metadatas=metadatas: {
+            "ids": [str(i) for i in range(offset, min(offset + limit, len(metadatas)))],
+            "metadatas": metadatas[offset:offset + limit],
+        }
+    
+    def get_collection(name):
+        if collections[name] is None:
+            raise ValueError(f"collection {name} is unavailable")
+        return handles[name]
+    
+    client = MagicMock()
+    client.list_collections.return_value = [MagicMock() for _ in collections]
+    for coll, name in zip(client.list_collections.return_value, collections):
+        coll.name = name
+    client.get_collection.side_effect = get_collection
+    client.handles = handles
+    
+    chromadb = MagicMock()
+    chromadb.PersistentClient.return_value = client
+    return chromadb
+
+class TestRagHelper:
+    """Test cases for the RAG helper functions"""
+    
+    def test_list_documents(self, capsys):
+        """Test listing sources across collections, tolerating a failed one"""
+        chromadb = mock_chroma_client({"docs": ["a.md", "b.md", "c.md"], "notes": ["d.md"], "broken": None})
+        
+        with patch.dict(sys.modules, {"chromadb": chromadb}), \
+             patch("rag_helper.LIST_BATCH_SIZE", 2):
+            assert rag_helper.list_documents()
+        
+        output = capsys.readouterr().out
+        assert "Collection 'docs': 3 documents" in output
+        assert "Collection 'notes': 1 documents" in output
+        assert "Error accessing collection broken" in output
+        assert "Found 4 total documents in 3 collections" in output
+        
+        # Only metadata is fetched, a page at a time, until a short page
+        handles = chromadb.PersistentClient.return_value.handles
+        assert handles["docs"].get.call_args_list == [
+            call(include=["metadatas"], limit=2, offset=0),
+            call(include=["metadatas"], limit=2, offset=2),
+        ]
+        handles["notes"].get.assert_called_once_with(include=["metadatas"], limit=2, offset=0)
+        assert "  3. c.md" in output
+    
+    def test_add_document(self, tmp_path, monkeypatch):
+        """Test documents are copied and indexed in-process"""
+        source = tmp_path / "src" / "notes.md"
+        source.parent.mkdir()
+        source.write_text("# Notes")
+        monkeypatch.chdir(tmp_path)
+        
+        rag = MagicMock()
+        rag.load_files.return_value = True
+        with patch("rag_helper.get_rag_manager", return_value=rag), \
+             patch("subprocess.run") as run:
+            assert rag_helper.add_document(str(source))
+            assert not rag_helper.add_document(str(tmp_path / "missing.md"))
+            
+            # Re-adding replaces the copy, falling back to a real copy
+            # when the file can't be hard-linked
+            with patch("os.link", side_effect=OSError):
+                assert rag_helper.add_document(str(source))
+        
+        assert (tmp_path / "notes.md").read_text() == "# Notes"
+        assert rag.load_files.call_count == 2
+        rag.load_files.assert_called_with(["notes.md"])
+        run.assert_not_called()
+    
+    def test_add_document_same_file(self, tmp_path, monkeypatch):
+        """Test adding a document through a symlink to its copy keeps the file"""
+        document = tmp_path / "notes.md"
+        document.write_text("# Notes")
+        link = tmp_path / "links" / "notes.md"
+        link.parent.mkdir()
+        link.symlink_to(document)
+        monkeypatch.chdir(tmp_path)
+        
+        rag = MagicMock()
+        rag.load_files.return_value = True
+        with patch("rag_helper.get_rag_manager", return_value=rag):
+            assert rag_helper.add_document(str(link))
+        
+        assert document.read_text() == "# Notes"
+        assert sorted(os.listdir(tmp_path)) == ["links", "notes.md"]
+    
+    def test_copy_failure_keeps_existing(self, tmp_path):
+        """Test a failed copy leaves the existing destination in place"""
+        source = tmp_path / "new.md"
+        source.write_text("new")
+        dest = tmp_path / "notes.md"
+        dest.write_text("old")
+        
+        with patch("os.link", side_effect=OSError), \
+             patch("shutil.copyfile", side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                rag_helper._copy_document(str(source), str(dest))
+        
+        assert dest.read_text() == "old"
+        assert sorted(os.listdir(tmp_path)) == ["new.md", "notes.md"]
+    
+    def test_add_documents_batch(self, tmp_path, monkeypatch):
+        """Test a batch is validated up front and indexed with one call"""
+        sources = []
+        for name in ("a.md", "b.txt"):
+            sources.append(tmp_path / "src" / name)
+        sources[0].parent.mkdir()
+        for source in sources:
+            source.write_text(source.name)
+        monkeypatch.chdir(tmp_path)
+        
+        rag = MagicMock()
+        rag.load_files.return_value = True
+        with patch("rag_helper.get_rag_manager", return_value=rag):
+            assert not rag_helper.add_documents([str(sources[0]), "missing.md"])
+            assert not (tmp_path / "a.md").exists()
+            
+            # Two documents with one basename would share a copy
+            other = tmp_path / "other" / "a.md"
+            other.parent.mkdir()
+            other.write_text("other")
+            assert not rag_helper.add_documents([str(sources[0]), str(other)])
+            assert not (tmp_path / "a.md").exists()
+            
+            assert rag_helper.add_documents([str(source) for source in sources])
+        
+        rag.load_files.assert_called_once_with(["a.md", "b.txt"])
+    
+    def test_add_long_document(self, tmp_path, monkeypatch):
+        """Test a document longer than chunk_size is split and indexed"""
+        from config import Config
+        from rag_manager import RAGManager
+        
+        with patch.object(RAGManager, "_initialize_vector_db"):
+            rag = RAGManager(Config())
+        rag.chroma_client = MagicMock()
+        rag.embedding_function = MagicMock(side_effect=lambda texts: [[float(len(text))] for text in texts])
+        rag.chunk_size = 200
+        
+        source = tmp_path / "src" / "long.md"
+        source.parent.mkdir()
+        source.write_text("Some words in a sentence. " * 40 + "Tail without a break " * 20)
+        monkeypatch.chdir(tmp_path)
+        
+        with patch("rag_helper.get_rag_manager", return_value=rag):
+            assert rag_helper.add_document(str(source))
+        
+        collection = rag.chroma_client.get_or_create_collection.return_value
+        documents = collection.add.call_args.kwargs["documents"]
+        assert len(documents) > 1
+        assert all(len(document) <= 200 for document in documents)
+    
+    def test_main_dispatch(self):
+        """Test simple command lines skip argparse and others still parse"""
+        with patch("rag_helper.start_rag") as start_rag, \
+             patch("rag_helper.add_documents") as add_documents, \
+             patch("argparse.ArgumentParser") as parser:
+            rag_helper.main(["start", "--web", "--no-interactive"])
+            rag_helper.main(["add", "a.md", "b.md"])
+            parser.assert_not_called()
+            
+            rag_helper.main(["add", "--help"])
+            parser.assert_called_once()
+        
+        start_rag.assert_called_once_with(interactive=False, web=True)
+        add_documents.assert_called_once_with(["a.md", "b.md"])
+        
+        with pytest.raises(SystemExit):
+            rag_helper.main(["start", "--bogus"])
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+test_rag_manager.py - Part of Reflexia Model Manager
+
+Copyright (c) 2025 Matthew D. Scott
+All rights reserved.
+
+This source code is licensed under the Reflexia Model Manager License
+found in the LICENSE file in the root directory of this source tree.
+
+Unauthorized use, reproduction, or distribution is prohibited.
+
+Tests for the RAGManager module
+"""
+import os
+import json
+import sys
+import pytest
+from unittest.mock import patch, MagicMock
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+import rag_manager as rag_manager_module
+from rag_manager import RAGManager, CachedEmbeddingFunction
+
+class TestRAGManager:
+    """Test cases for the RAGManager class"""
+    
+    @pytest.fixture
+    def rag_manager(self):
+        """Create a RAG manager with a mocked vector database"""
+        with patch.object(RAGManager, "_initialize_vector_db"):
+            rag_manager = RAGManager(Config())
+        rag_manager.chroma_client = MagicMock()
+        rag_manager.embedding_function = MagicMock(side_effect=lambda texts: [[float(len(text))] for text in texts])
+        return rag_manager
+    
+    def test_load_files(self, rag_manager, tmp_path, monkeypatch):
+        """Test several files are chunked and inserted in one call"""
+        first = tmp_path / "first.md"
+        second = tmp_path / "second.txt"
+        first.write_text("First document.")
+        second.write_text("Second document.")
+        
+        assert rag_manager.load_files([first, second], metadata={"tag": "test"})
+        
+        collection = rag_manager.chroma_client.get_or_create_collection.return_value
+        collection.add.assert_called_once()
+        kwargs = collection.add.call_args.kwargs
+        assert kwargs["ids"] == [f"{first.resolve()}-0", f"{second.resolve()}-0"]
+        assert kwargs["documents"] == ["First document.", "Second document."]
+        assert all(metadata["tag"] == "test" for metadata in kwargs["metadatas"])
+        
+        # Files sharing a stem or a basename get distinct ids
+        other = tmp_path / "other"
+        other.mkdir()
+        (other / "first.md").write_text("Other first.")
+        (tmp_path / "first.txt").write_text("First text.")
+        assert rag_manager.load_files([other / "first.md", tmp_path / "first.txt"])
+        kwargs = collection.add.call_args.kwargs
+        assert len(set(kwargs["ids"]) | {f"{first.resolve()}-0"}) == 3
+        collection.add.reset_mock()
+        
+        # A file loaded again by another spelling of its path is skipped
+        monkeypatch.chdir(tmp_path)
+        assert rag_manager.load_files(["first.md", "other/../second.txt"])
+        collection.add.assert_not_called()
+        
+        # Nothing is inserted when any file in the batch can't be read
+        assert not rag_manager.load_files([first, tmp_path / "missing.md"])
+        collection.add.assert_not_called()
+    
+    def test_add_documents_batches(self, rag_manager):
+        """Test documents are added in embedding-sized batches"""
+        rag_manager.embedding_batch_size = 2
+        documents = [{"id": f"doc-{i}", "text": f"Text {i}"} for i in range(5)]
+        
+        assert rag_manager.add_documents(documents)
+        
+        collection = rag_manager.chroma_client.get_or_create_collection.return_value
+        batches = [call.kwargs["ids"] for call in collection.add.call_args_list]
+        assert batches == [["doc-0", "doc-1"], ["doc-2", "doc-3"], ["doc-4"]]
+    
+    def test_add_documents_sorted_by_length(self, rag_manager):
+        """Test documents are batched shortest first, keeping ids and metadata aligned"""
+        rag_manager.embedding_batch_size = 2
+        documents = [{"id": f"doc-{i}", "text": "x" * length, "metadata": {"length": length}}
+                     for i, length in enumerate([30, 10, 20])]
+        
+        assert rag_manager.add_documents(documents)
+        
+        collection = rag_manager.chroma_client.get_or_create_collection.return_value
+        calls = [call.kwargs for call in collection.add.call_args_list]
+        assert [call["ids"] for call in calls] == [["doc-1", "doc-2"], ["doc-0"]]
+        assert [[len(text) for text in call["documents"]] for call in calls] == [[10, 20], [30]]
+        assert calls[0]["metadatas"] == [{"length": 10}, {"length": 20}]
+    
+    def test_embedding_backend(self, rag_manager):
+        """Test the ONNX backend is used for MiniLM and falls back otherwise"""
+        embedding_functions = MagicMock()
+        rag_manager.embedding_backend = "onnx"
+        
+        onnx = rag_manager._create_embedding_function(embedding_functions)
+        assert onnx is embedding_functions.ONNXMiniLM_L6_V2.return_value
+        
+        embedding_functions.ONNXMiniLM_L6_V2.side_effect = ValueError("onnxruntime missing")
+        fallback = rag_manager._create_embedding_function(embedding_functions)
+        assert fallback is embedding_functions.SentenceTransformerEmbeddingFunction.return_value
+        
+        rag_manager.embedding_model = "all-mpnet-base-v2"
+        rag_manager._create_embedding_function(embedding_functions)
+        assert embedding_functions.ONNXMiniLM_L6_V2.call_count == 2
+    
+    def test_chunk_text_breaks(self, rag_manager):
+        """Test text is split on the coarsest separator that fits and merged up to chunk_size"""
+        rag_manager.chunk_size = 40
+        rag_manager.chunk_overlap = 0
+        text = "First sentence here. Second one.\n\nThird paragraph goes on and on. Done now. " * 3
+        
+        chunks = rag_manager.chunk_text(text)
+        
+        assert chunks[0] == "First sentence here. Second one.\n\n"
+        assert chunks[1] == "Third paragraph goes on and on. "
+        assert "".join(chunks) == text
+        assert all(len(chunk) <= rag_manager.chunk_size for chunk in chunks)
+        
+        # Unbreakable text is cut at chunk_size
+        assert rag_manager.chunk_text("x" * 100) == ["x" * 40, "x" * 40, "x" * 20]
+    
+    def test_chunk_text_overlap(self, rag_manager):
+        """Test consecutive chunks share trailing pieces up to chunk_overlap"""
+        rag_manager.chunk_size = 20
+        rag_manager.chunk_overlap = 10
+        
+        chunks = rag_manager.chunk_text("one two three four five six seven eight")
+        
+        assert chunks == ["one two three four ", "four five six seven ", "six seven eight"]
+        assert all(len(chunk) <= rag_manager.chunk_size for chunk in chunks)
+    
+    def test_cached_embedding_function(self, tmp_path):
+        """Test cached texts are not sent to the wrapped embedding function again"""
+        embed = MagicMock(side_effect=lambda texts: [[float(len(text)), 0.5] for text in texts])
+        cache_path = tmp_path / "cache.sqlite3"
+        cached = CachedEmbeddingFunction(embed, cache_path, "model-a")
+        
+        assert cached(["one", "three", "one"]) == [[3.0, 0.5], [5.0, 0.5], [3.0, 0.5]]
+        embed.assert_called_once_with(["one", "three"])
+        
+        # Hits survive a new wrapper on the same file; only misses are embedded
+        cached = CachedEmbeddingFunction(embed, cache_path, "model-a")
+        assert cached(["three", "four"]) == [[5.0, 0.5], [4.0, 0.5]]
+        embed.assert_called_with(["four"])
+        
+        # Keys include the model, so another model misses
+        cached = CachedEmbeddingFunction(embed, cache_path, "model-b")
+        cached(["one"])
+        embed.assert_called_with(["one"])
+    
+    def test_collection_handle_reused(self, rag_manager):
+        """Test collection handles are resolved once and dropped after errors"""
+        client = rag_manager.chroma_client
+        client.get_collection.return_value.query.return_value = {"documents": [["Text"]], "distances": [[0.5]]}
+        
+        rag_manager.query("first")
+        rag_manager.query("second")
+        client.get_collection.assert_called_once()
+        
+        client.get_collection.return_value.query.side_effect = RuntimeError("collection deleted")
+        assert rag_manager.query("third") == []
+        rag_manager.query("fourth")
+        assert client.get_collection.call_count == 2
+    
+    def test_process_dataset_directory(self, rag_manager, tmp_path):
+        """Test JSON and JSONL datasets are found recursively and converted"""
+        nested = tmp_path / "data" / "nested"
+        nested.mkdir(parents=True)
+        (tmp_path / "data" / "array.json").write_text('[{"instruction": "Hi", "output": "Hello"}, {"prompt": "x"}]')
+        (nested / "lines.jsonl").write_text('{"prompt": "Q", "completion": "A"}\n\n')
+        (nested / "notes.txt").write_text('{"prompt": "skip", "response": "me"}')
+        output_file = tmp_path / "out.jsonl"
+        
+        rag_manager._process_dataset_directory(tmp_path / "data", output_file)
+        
+        lines = [json.loads(line) for line in output_file.read_text().splitlines()]
+        assert sorted(lines, key=lambda example: example["prompt"]) == [
+            {"prompt": "Hi", "response": "Hello"},
+            {"prompt": "Q", "response": "A"}
+        ]
+    
+    def test_query_similarities(self, rag_manager):
+        """Test distances become similarities and missing values get defaults"""
+        collection = rag_manager.chroma_client.get_collection.return_value
+        collection.query.return_value = {
+            "documents": [["A", "B", "C"]],
+            "metadatas": [[{"source": "a.md"}]],
+            "distances": [[0.0, 1.0]]
+        }
+        
+        results = rag_manager.query("question")
+        
+        assert [result["similarity"] for result in results] == [1.0, 0.5, 0.5]
+        assert [result["metadata"] for result in results] == [{"source": "a.md"}, {}, {}]
+        assert [result["text"] for result in results] == ["A", "B", "C"]
+    
+    def test_read_large_text_file(self, tmp_path):
+        """Test memory-mapped reads decode UTF-8 and translate newlines like text mode"""
+        path = tmp_path / "large.txt"
+        path.write_bytes("café\r\nline two\rline three\n".encode("utf-8"))
+        
+        with patch.object(rag_manager_module, "MMAP_READ_THRESHOLD", 1):
+            assert rag_manager_module._read_text_file(path) == "café\nline two\nline three\n"
+        assert rag_manager_module._read_text_file(path) == "café\nline two\nline three\n"
+    
+    def test_generate_rag_response_prompt(self, rag_manager):
+        """Test retrieved contexts are numbered into the prompt"""
+        rag_manager.model_manager = MagicMock()
+        rag_manager.model_manager.generate_response.return_value = "Answer"
+        context_docs = [
+            {"text": "Alpha", "metadata": {"source": "a.md"}},
+            {"text": "Beta", "metadata": {"source": "a.md"}}
+        ]
+        
+        with patch.object(rag_manager, "query", return_value=context_docs):
+            result = rag_manager.generate_rag_response("What?", system_prompt="Be brief.")
+        
+        prompt = rag_manager.model_manager.generate_response.call_args.args[0]
+        system_prompt = rag_manager.model_manager.generate_response.call_args.kwargs["system_prompt"]
+        assert prompt == "Context Information:\nContext 1:\nAlpha\n\nContext 2:\nBeta\n\nQuestion: What?\n\nAnswer:"
+        assert system_prompt.startswith("Be brief.\nAnswer the question based on the context provided.")
+        assert result["sources"] == ["a.md"]
+    
+    def test_faiss_query_falls_back(self, rag_manager):
+        """Test FAISS queries fall back to Chroma when faiss is not installed"""
+        collection = rag_manager.chroma_client.get_collection.return_value
+        collection.query.return_value = {"documents": [["Text"]], "distances": [[0.0]]}
+        rag_manager.query_backend = "faiss"
+        
+        with patch.dict(sys.modules, {"faiss": None, "numpy": None}):
+            results = rag_manager.query("question")
+        
+        assert [result["text"] for result in results] == ["Text"]
+        assert rag_manager.query_backend == "chroma"
+        collection.query.assert_called_once()
+    
+    def test_shared_embedding_function(self, rag_manager):
+        """Test managers with the same backend and model share one embedding function"""
+        embedding_functions = MagicMock()
+        embedding_functions.SentenceTransformerEmbeddingFunction.side_effect = lambda **kwargs: MagicMock()
+        rag_manager.embedding_model = "shared-test-model"
+        
+        with patch.dict(rag_manager_module._EMBEDDING_FUNCTIONS, clear=True):
+            first = rag_manager._shared_embedding_function(embedding_functions)
+            second = rag_manager._shared_embedding_function(embedding_functions)
+            rag_manager.embedding_model = "other-test-model"
+            other = rag_manager._shared_embedding_function(embedding_functions)
+        
+        assert first is second
+        assert other is not first
+        assert embedding_functions.SentenceTransformerEmbeddingFunction.call_count == 2
+    
+    def test_add_documents_embeds_duplicates_once(self, rag_manager):
+        """Test identical texts are embedded once and share the vector"""
+        documents = [{"id": f"doc-{i}", "text": text} for i, text in enumerate(["Header", "Body text", "Header"])]
+        
+        assert rag_manager.add_documents(documents)
+        
+        rag_manager.embedding_function.assert_called_once_with(["Header", "Body text"])
+        kwargs = rag_manager.chroma_client.get_or_create_collection.return_value.add.call_args.kwargs
+        assert kwargs["ids"] == ["doc-0", "doc-2", "doc-1"]
+        assert kwargs["embeddings"] == [[6.0], [6.0], [9.0]]
+    
+    def test_add_documents_skips_existing_ids(self, rag_manager):
+        """Test documents already in the collection are not embedded or added again"""
+        collection = rag_manager.chroma_client.get_or_create_collection.return_value
+        collection.get.return_value = {"ids": ["doc-0"]}
+        documents = [{"id": f"doc-{i}", "text": f"Text {i}"} for i in range(2)]
+        
+        assert rag_manager.add_documents(documents)
+        assert rag_manager.add_documents(documents)
+        
+        collection.get.assert_called_once()
+        collection.add.assert_called_once()
+        assert collection.add.call_args.kwargs["ids"] == ["doc-1"]
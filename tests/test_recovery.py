@@ -17,11 +17,12 @@ from unittest.mock import patch, MagicMock, call
 import sys
 import os
 import time
+import threading
 
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from recovery import CircuitBreaker, HealthMonitor, protect_model_manager
+from recovery import CircuitBreaker, CircuitOpenError, HealthMonitor, circuit_breaker, protect_model_manager
 
 class TestCircuitBreaker(unittest.TestCase):
     """Test cases for circuit breaker implementation"""
@@ -102,6 +103,57 @@ class TestCircuitBreaker(unittest.TestCase):
         self.assertEqual(cb.failure_count, 0)
         self.assertTrue(result.success)
 
+    @patch('recovery.time.monotonic_ns')
+    def test_circuit_breaker_recovery_timeout_monotonic(self, mock_monotonic_ns):
+        """Test recovery timeout is measured on the monotonic clock"""
+        mock_monotonic_ns.return_value = 100 * 1_000_000_000
+        cb = CircuitBreaker("test", failure_threshold=1, recovery_timeout=30)
+        
+        cb.record_failure()
+        self.assertEqual(cb.state, CircuitBreaker.OPEN)
+        
+        mock_monotonic_ns.return_value = 130 * 1_000_000_000
+        self.assertFalse(cb.allow_request())
+        
+        mock_monotonic_ns.return_value = 131 * 1_000_000_000
+        self.assertTrue(cb.allow_request())
+        self.assertEqual(cb.state, CircuitBreaker.HALF_OPEN)
+        
+        cb.record_success()
+        self.assertEqual(cb.state, CircuitBreaker.CLOSED)
+
+    def test_circuit_breaker_concurrent_failures(self):
+        """Test failures recorded from several threads are all counted"""
+        cb = CircuitBreaker("test", failure_threshold=1000)
+        
+        def fail_many():
+            for _ in range(100):
+                cb.record_failure()
+        
+        threads = [threading.Thread(target=fail_many) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(cb.failure_count, 800)
+        self.assertEqual(cb.state, CircuitBreaker.CLOSED)
+
+    def test_circuit_breaker_decorator_raises_when_open(self):
+        """Test the decorator counts failures and blocks calls once open"""
+        cb = CircuitBreaker("test", failure_threshold=2)
+        func = MagicMock(side_effect=ValueError("boom"), __name__="func")
+        protected = circuit_breaker(cb)(func)
+        
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                protected()
+        
+        with self.assertRaises(CircuitOpenError) as ctx:
+            protected()
+        self.assertEqual(ctx.exception.name, "test")
+        self.assertEqual(func.call_count, 2)
+
 class TestHealthMonitor(unittest.TestCase):
     """Test cases for health monitor implementation"""
     
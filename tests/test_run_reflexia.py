@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+test_run_reflexia.py - Part of Reflexia Model Manager
+
+Copyright (c) 2025 Matthew D. Scott
+All rights reserved.
+
+This source code is licensed under the Reflexia Model Manager License
+found in the LICENSE file in the root directory of this source tree.
+
+Unauthorized use, reproduction, or distribution is prohibited.
+
+Tests for the terminal-safe launcher
+"""
+import os
+import struct
+import sys
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import run_reflexia
+
+class TestProcessCommand:
+    """Test cases for reading another process's command line"""
+    
+    def test_procargs_command(self):
+        """Test only argv is taken from a KERN_PROCARGS2 buffer"""
+        raw = (struct.pack('i', 2)
+               + b'/usr/local/bin/zsh\0\0\0\0'
+               + b'-zsh\0--login\0'
+               + b'PSModulePath=/usr/local/microsoft/powershell/Modules\0'
+               + b'TERM=xterm\0')
+        
+        assert run_reflexia._procargs_command(raw) == '-zsh --login'
+        assert 'powershell' not in run_reflexia._procargs_command(raw).lower()
+    
+    def test_procargs_command_truncated(self):
+        """Test short or malformed buffers give an empty command"""
+        assert run_reflexia._procargs_command(b'') == ''
+        assert run_reflexia._procargs_command(struct.pack('i', 1) + b'/bin/zsh') == ''